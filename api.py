@@ -1,54 +1,260 @@
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import HTMLResponse
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 import argparse
+import asyncio
+import json
+import os
+import sys
 
-from sentiment_analysis import NewsSentimentScanner
+from extraction import get_extraction_pool, shutdown_extraction_pools
+from http_session import (
+    DEFAULT_HTTP_TIMEOUT, DEFAULT_MAX_CONNECTIONS, DEFAULT_PER_HOST_LIMIT, DEFAULT_RATE_LIMIT, AsyncHttpSession,
+)
+from jobs import DEFAULT_JOB_RETENTION, DEFAULT_JOB_WORKERS, DEFAULT_MAX_JOBS, DEFAULT_RESULT_TTL, JobQueueFull, ScanJobQueue
+from metrics import metrics
+from sentiment_analysis import GOOGLE_NEWS_RSS_URL, NewsSentimentScanner
+from sentiment_engines import DEFAULT_CHUNK_STRIDE, DEFAULT_MAX_CHUNKS, DEFAULT_MAX_LENGTH, current_rss_bytes, registry
+from series import DEFAULT_EWMA_ALPHA, SeriesStore
+
+DEFAULT_WATCH_INTERVAL = 300
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Eagerly load the analyzers listed in SENTIMENT_PRELOAD_ANALYZERS (e.g. "vader,finbert").
+
+    The extraction process pool sized by SENTIMENT_EXTRACT_PROCESSES and one
+    pooled HTTP session are shared by all requests and closed with the app.
+    The session's per-host rate limit, concurrent requests per host, total
+    connections and timeout come from SENTIMENT_RATE_LIMIT,
+    SENTIMENT_PER_HOST_LIMIT, SENTIMENT_MAX_CONNECTIONS and
+    SENTIMENT_HTTP_TIMEOUT. With SENTIMENT_WATCH_MARKETS set,
+    a background job re-scans those markets every SENTIMENT_WATCH_INTERVAL
+    seconds and records their sentiment series for /series. Background scan
+    jobs run at most SENTIMENT_JOB_WORKERS at a time; their results are kept
+    and reused for SENTIMENT_RESULT_TTL seconds, finished jobs are forgotten
+    after SENTIMENT_JOB_RETENTION seconds, and at most SENTIMENT_MAX_JOBS are
+    kept.
+    """
+    for name in filter(None, (n.strip() for n in os.environ.get("SENTIMENT_PRELOAD_ANALYZERS", "").split(","))):
+        await run_in_threadpool(registry.get, name)
+    processes = _extract_processes()
+    if processes:
+        get_extraction_pool(processes)
+    app.state.http_session = AsyncHttpSession(
+        rate_limit=float(os.environ.get("SENTIMENT_RATE_LIMIT", DEFAULT_RATE_LIMIT)),
+        per_host_limit=_positive_int_env("SENTIMENT_PER_HOST_LIMIT", DEFAULT_PER_HOST_LIMIT),
+        max_connections=_positive_int_env("SENTIMENT_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS),
+        timeout=float(os.environ.get("SENTIMENT_HTTP_TIMEOUT", DEFAULT_HTTP_TIMEOUT)),
+    )
+    app.state.jobs = ScanJobQueue(
+        workers=int(os.environ.get("SENTIMENT_JOB_WORKERS", DEFAULT_JOB_WORKERS)),
+        result_ttl=float(os.environ.get("SENTIMENT_RESULT_TTL", DEFAULT_RESULT_TTL)),
+        retention=float(os.environ.get("SENTIMENT_JOB_RETENTION", DEFAULT_JOB_RETENTION)),
+        max_jobs=int(os.environ.get("SENTIMENT_MAX_JOBS", DEFAULT_MAX_JOBS)),
+    )
+    app.state.series = SeriesStore(alpha=float(os.environ.get("SENTIMENT_WATCH_EWMA_ALPHA", DEFAULT_EWMA_ALPHA)))
+    watch_markets = [m.strip() for m in os.environ.get("SENTIMENT_WATCH_MARKETS", "").split(",") if m.strip()]
+    watch_task = None
+    if watch_markets:
+        interval = float(os.environ.get("SENTIMENT_WATCH_INTERVAL", DEFAULT_WATCH_INTERVAL))
+        watch_task = asyncio.create_task(_watch_markets(watch_markets, interval, app.state.series))
+    yield
+    if watch_task is not None:
+        watch_task.cancel()
+        try:
+            await watch_task
+        except asyncio.CancelledError:
+            pass
+    await app.state.jobs.aclose()
+    await app.state.http_session.aclose()
+    shutdown_extraction_pools()
+
+def _positive_int_env(name, default):
+    """Read a count from the environment, failing at startup rather than hanging the first scan."""
+    value = os.environ.get(name, str(default))
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise ValueError(f"{name} must be a positive integer, got '{value}'")
+    return number
 
 app = FastAPI(
     title="News Sentiment API",
     description="API for fetching news and analyzing sentiment.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 templates = Jinja2Templates(directory="templates")
 
-class ScanRequest(BaseModel):
-    market: str = Field(default="gold", description="The market topic to search for.")
+class ScanOptions(BaseModel):
     num_articles: int = Field(default=10, ge=1, description="Number of articles to fetch per query.")
-    workers: int = Field(default=10, ge=1, description="Number of concurrent workers.")
-    analyzer: str = Field(default="vader", pattern="^(vader|finbert)$", description="Sentiment analyzer to use.")
+    workers: int = Field(default=10, ge=1, description="Number of concurrent workers. Ignored by the API, whose downloads are bounded by the shared session (SENTIMENT_PER_HOST_LIMIT, SENTIMENT_MAX_CONNECTIONS).")
+    analyzer: str = Field(default="vader", pattern="^(vader|finbert|finbert-int8|finbert-onnx)$", description="Sentiment analyzer to use.")
     max_age: Optional[str] = Field(default='7d', description="Maximum age of articles (e.g., 1h, 5d, 2w, 1m, 1y).")
+    pooling: str = Field(default="none", pattern="^(none|mean|weighted|max)$", description="FinBERT only: pool overlapping chunks of long articles instead of truncating them.")
+    max_chunks: int = Field(default=DEFAULT_MAX_CHUNKS, ge=1, description="Maximum chunks scored per article when pooling.")
+    chunk_stride: int = Field(default=DEFAULT_CHUNK_STRIDE, ge=0, lt=DEFAULT_MAX_LENGTH - 2, description="Tokens of overlap between consecutive chunks when pooling.")
+
+class ScanRequest(ScanOptions):
+    market: str = Field(default="gold", description="The market topic to search for.")
+
+class BatchScanRequest(ScanOptions):
+    markets: List[str] = Field(min_length=1, description="Market topics to scan together in one batch.")
 
 @app.get("/health", response_model=dict)
 async def health_check():
-    """Health check endpoint to confirm the API is running."""
-    return {"status": "ok"}
+    """Health check endpoint to confirm the API is running and report loaded models."""
+    return {
+        "status": "ok",
+        "models": registry.stats(),
+        "jobs": _job_queue().stats(),
+        "process": {"rss_bytes": current_rss_bytes()},
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Per-stage latency histograms, error and cache counters and in-flight gauges in the Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
     """Serve the webform for sentiment analysis."""
     return templates.TemplateResponse("index.html", {"request": request})
 
+def _http_session() -> Optional[AsyncHttpSession]:
+    return getattr(app.state, "http_session", None)
+
+def _job_queue() -> ScanJobQueue:
+    if getattr(app.state, "jobs", None) is None:
+        app.state.jobs = ScanJobQueue()
+    return app.state.jobs
+
+def _job_key(request: ScanRequest) -> str:
+    """Requests with the same scan options share a job; `workers` does not affect API scans."""
+    return json.dumps(request.model_dump(exclude={"workers"}), sort_keys=True)
+
+def _extract_processes() -> int:
+    return int(os.environ.get("SENTIMENT_EXTRACT_PROCESSES", "0"))
+
+def _scan_config(request: ScanOptions, market: str) -> argparse.Namespace:
+    """Convert a scan request into the argparse.Namespace-like config the scanner expects."""
+    return argparse.Namespace(
+        market=market,
+        num_articles=request.num_articles,
+        workers=request.workers,
+        format='json', # API always returns JSON
+        analyzer=request.analyzer,
+        file_path=None, # API does not write to file directly
+        max_age=request.max_age,
+        pooling=request.pooling,
+        max_chunks=request.max_chunks,
+        chunk_stride=request.chunk_stride,
+        cache_dir=os.environ.get("SENTIMENT_CACHE_DIR"),
+        extract_processes=_extract_processes(),
+        rss_base_url=os.environ.get("SENTIMENT_RSS_BASE_URL", GOOGLE_NEWS_RSS_URL),
+    )
+
+async def _watch_markets(markets, interval, store):
+    """Background job: one watch cycle over `markets` every `interval` seconds, scoring only new articles."""
+    options = ScanOptions(analyzer=os.environ.get("SENTIMENT_WATCH_ANALYZER", "vader"))
+    scanner = await run_in_threadpool(NewsSentimentScanner, _scan_config(options, markets[0]), _http_session())
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        try:
+            await scanner.watch_cycle_async(markets, store)
+        except Exception as e:
+            print(f"Watch cycle for {', '.join(markets)} failed: {e}", file=sys.stderr)
+        await asyncio.sleep(max(0.0, interval - (loop.time() - start)))
+
+@app.get("/series", response_model=dict)
+async def sentiment_series(
+    market: Optional[str] = Query(default=None, description="Only this market; all watched markets if omitted."),
+    since: Optional[float] = Query(default=None, description="Only points recorded after this Unix timestamp."),
+    limit: Optional[int] = Query(default=None, ge=1, description="At most this many of the latest points per market."),
+):
+    """Rolling sentiment per watched market as columns: per-cycle new articles and mean, EWMA polarity, its std and total."""
+    store = getattr(app.state, "series", None) or SeriesStore()
+    markets = [market] if market else store.markets()
+    series = {name: store.get(name, since, limit) for name in markets}
+    if market and series[market] is None:
+        raise HTTPException(status_code=404, detail=f"No series recorded for market '{market}'")
+    return {'markets': series}
+
 @app.post("/scan", response_model=dict)
-async def scan_sentiment(request: ScanRequest):
-    """Analyze news sentiment based on the provided parameters."""
+async def scan_sentiment(
+    request: ScanRequest,
+    background: bool = Query(default=False, description="Queue the scan as a job and return its id instead of waiting."),
+):
+    """Analyze news sentiment based on the provided parameters.
+
+    With `background=true` the scan is queued and 202 is returned with a job
+    id to poll at /jobs/{job_id}. Identical requests share the in-flight job
+    and reuse its result for SENTIMENT_RESULT_TTL seconds.
+    """
+    if background:
+        async def run():
+            scanner = await run_in_threadpool(NewsSentimentScanner, _scan_config(request, request.market), _http_session())
+            return await scanner.run_async(return_json=True)
+
+        try:
+            job, reused = _job_queue().submit(_job_key(request), run)
+        except JobQueueFull as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        body = job.to_dict(include_result=False)
+        body.update(reused=reused, url=f"/jobs/{job.id}")
+        return JSONResponse(body, status_code=202)
     try:
-        # Convert Pydantic model to argparse.Namespace-like object
-        config = argparse.Namespace(
-            market=request.market,
-            num_articles=request.num_articles,
-            workers=request.workers,
-            format='json', # API always returns JSON
-            analyzer=request.analyzer,
-            file_path=None, # API does not write to file directly
-            max_age=request.max_age,
-        )
-        
-        scanner = NewsSentimentScanner(config)
-        results = scanner.run(return_json=True)
+        # Creating the scanner may load a model, so keep it off the event loop.
+        scanner = await run_in_threadpool(NewsSentimentScanner, _scan_config(request, request.market), _http_session())
+        results = await scanner.run_async(return_json=True)
         return results
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/jobs/{job_id}", response_model=dict)
+async def scan_job(job_id: str):
+    """Status of a background scan job, with its result once it is done."""
+    job = _job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired job '{job_id}'")
+    return job.to_dict()
+
+@app.post("/scan/stream")
+async def scan_sentiment_stream(
+    request: ScanRequest,
+    format: str = Query(default="ndjson", pattern="^(ndjson|sse)$", description="Stream as NDJSON lines or Server-Sent Events."),
+):
+    """Stream each scored article with the running summary, then the final summary."""
+    try:
+        scanner = await run_in_threadpool(NewsSentimentScanner, _scan_config(request, request.market), _http_session())
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def events():
+        async for event in scanner.iter_events_async():
+            if format == "sse":
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+            else:
+                yield json.dumps(event) + "\n"
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(events(), media_type=media_type)
+
+
+@app.post("/scan/batch", response_model=dict)
+async def scan_sentiment_batch(request: BatchScanRequest):
+    """Scan several markets through one shared fetch pool and analyzer, returning per-market summaries."""
+    try:
+        scanner = await run_in_threadpool(NewsSentimentScanner, _scan_config(request, request.markets[0]), _http_session())
+        return await scanner.run_markets_async(request.markets, return_json=True)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
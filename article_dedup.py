@@ -0,0 +1,229 @@
+import base64
+import binascii
+import re
+import threading
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid', 'oc', 'ocid', 'cmpid',
+    'ref', 'ref_src', 'referrer', 'smid', 'guccounter', 'guce_referrer', 'guce_referrer_sig',
+    'yclid', 'igshid', '_ga', '_gl', 'ito', 'ns_mchannel', 'ns_source', 'ns_campaign',
+}
+TRACKING_PREFIXES = ('utm_', 'mkt_', 'pk_', 'hsa_')
+
+DEFAULT_TITLE_SIMILARITY = 0.85
+DEFAULT_SEEN_ARTICLES = 100000
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _decode_google_news_id(article_id):
+    """Extract the publisher URL from a legacy `news.google.com/rss/articles/CBMi...` id.
+
+    Those ids are url-safe base64 protobuf messages whose field 4 holds the URL.
+    Newer opaque ids (e.g. `AU_yqL...`) cannot be decoded offline and return None.
+    """
+    try:
+        data = base64.urlsafe_b64decode(article_id + '=' * (-len(article_id) % 4))
+    except (binascii.Error, ValueError):
+        return None
+    start = data.find(b'\x22')
+    if start < 0:
+        return None
+    length, shift, pos = 0, 0, start + 1
+    while pos < len(data):
+        byte = data[pos]
+        length |= (byte & 0x7f) << shift
+        pos += 1
+        if not byte & 0x80:
+            break
+        shift += 7
+    url = data[pos:pos + length].decode('utf-8', errors='ignore')
+    return url if url.startswith(('http://', 'https://')) else None
+
+
+def unwrap_redirect(url):
+    """Return the publisher URL hidden behind a Google News redirect, or `url` unchanged."""
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+    host = parts.netloc.lower()
+    if host not in ('news.google.com', 'www.google.com', 'google.com'):
+        return url
+    if parts.path == '/url':
+        target = dict(parse_qsl(parts.query)).get('url') or dict(parse_qsl(parts.query)).get('q')
+        return target if target and target.startswith(('http://', 'https://')) else url
+    match = re.match(r"^/(?:rss/)?articles/([A-Za-z0-9_-]+)", parts.path)
+    if match:
+        return _decode_google_news_id(match.group(1)) or url
+    return url
+
+
+def canonicalize_url(url):
+    """Normalise an article link so that the same article always maps to the same key.
+
+    Google News redirects are unwrapped, the scheme and host are lower-cased,
+    `www.`, default ports, fragments, trailing slashes and tracking parameters
+    are dropped, and the remaining query parameters are sorted. A malformed
+    link (bad port, broken IPv6 host) is only stripped, so one bad feed entry
+    cannot abort a scan.
+    """
+    try:
+        parts = urlsplit(unwrap_redirect(url.strip()))
+        port = parts.port
+    except ValueError:
+        return url.strip()
+    scheme = parts.scheme.lower() or 'https'
+    if scheme == 'http':
+        scheme = 'https'
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if port and port not in (80, 443):
+        host = f"{host}:{port}"
+    path = re.sub(r"/{2,}", "/", parts.path).rstrip('/') or '/'
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ''))
+
+
+def normalize_title(title, source=None):
+    """Lower-case a headline and drop punctuation and the ` - Publisher` suffix Google News appends."""
+    title = title or ''
+    if source and title.endswith(f" - {source}"):
+        title = title[:-len(source) - 3]
+    elif ' - ' in title:
+        title = title.rsplit(' - ', 1)[0]
+    return ' '.join(_WORD_RE.findall(title.lower()))
+
+
+def title_similarity(a, b):
+    """Jaccard similarity of the word sets of two normalised titles."""
+    words_a, words_b = set(a.split()), set(b.split())
+    if not words_a or not words_b:
+        return 0.0
+    return len(words_a & words_b) / len(words_a | words_b)
+
+
+class UniqueArticle:
+    """One article after deduplication, with every query whose feed contained it."""
+
+    def __init__(self, item, canonical_link, normalized_title):
+        self.item = item
+        self.title = item.title
+        self.link = item.link
+        self.published = getattr(item, 'published', '')
+        # Download the publisher's page directly when the redirect can be unwrapped.
+        self.fetch_url = unwrap_redirect(item.link)
+        self.canonical_link = canonical_link
+        self.normalized_title = normalized_title
+        self.queries = []
+
+
+class ArticleDeduplicator:
+    """Merges feed entries from overlapping queries into one entry per article.
+
+    Entries are matched first on their canonical link, then on near-identical
+    titles, so the same story syndicated under a different URL is also merged.
+    `add` is thread-safe and can be called as each query's feed arrives.
+    """
+
+    def __init__(self, title_threshold=DEFAULT_TITLE_SIMILARITY):
+        self.title_threshold = title_threshold
+        self.total_seen = 0
+        self._by_link = {}
+        self._by_title = {}
+        self._by_word = {}
+        self._articles = []
+        self._lock = threading.Lock()
+
+    def add(self, query, item):
+        """Record that `query` matched `item`; return the new UniqueArticle, or None if it is a duplicate."""
+        canonical_link = canonicalize_url(item.link)
+        source = getattr(item, 'source', None)
+        normalized_title = normalize_title(item.title, source.get('title') if isinstance(source, dict) else None)
+        with self._lock:
+            self.total_seen += 1
+            article = self._by_link.get(canonical_link) or self._find_similar_title(normalized_title)
+            is_new = article is None
+            if is_new:
+                article = UniqueArticle(item, canonical_link, normalized_title)
+                self._articles.append(article)
+                self._by_title.setdefault(normalized_title, article)
+                for word in set(normalized_title.split()):
+                    self._by_word.setdefault(word, []).append(article)
+            self._by_link.setdefault(canonical_link, article)
+            if query not in article.queries:
+                article.queries.append(query)
+        return article if is_new else None
+
+    def articles(self):
+        with self._lock:
+            return list(self._articles)
+
+    @property
+    def duplicates_removed(self):
+        return self.total_seen - len(self._articles)
+
+    def _find_similar_title(self, normalized_title):
+        if not normalized_title:
+            return None
+        exact = self._by_title.get(normalized_title)
+        if exact is not None or self.title_threshold >= 1:
+            return exact
+        candidates = {}
+        for word in set(normalized_title.split()):
+            for article in self._by_word.get(word, ()):
+                candidates[id(article)] = article
+        best, best_score = None, self.title_threshold
+        for article in candidates.values():
+            score = title_similarity(normalized_title, article.normalized_title)
+            if score >= best_score:
+                best, best_score = article, score
+        return best
+
+
+class SeenArticles:
+    """Canonical links handled by earlier scans, each with an optional value (e.g. the article's polarity).
+
+    Links are kept in least-recently-seen order and the oldest are forgotten
+    beyond `max_entries`; articles still in the feeds are refreshed on every
+    scan, so only stories that dropped out of the feeds can age out.
+    """
+
+    def __init__(self, max_entries=DEFAULT_SEEN_ARTICLES):
+        self.max_entries = max_entries
+        self._links = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._links)
+
+    def __contains__(self, link):
+        with self._lock:
+            return link in self._links
+
+    def add(self, link, value=None):
+        """Record `link` (updating its value if one is given); return True if it was not seen before."""
+        with self._lock:
+            if link in self._links:
+                self._links.move_to_end(link)
+                if value is not None:
+                    self._links[link] = value
+                return False
+            self._links[link] = value
+            while len(self._links) > self.max_entries:
+                self._links.popitem(last=False)
+            return True
+
+    def get(self, link, default=None):
+        """The value recorded for `link`, refreshing it, or `default` if it is unknown."""
+        with self._lock:
+            if link not in self._links:
+                return default
+            self._links.move_to_end(link)
+            return self._links[link]
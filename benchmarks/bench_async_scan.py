@@ -0,0 +1,84 @@
+"""Throughput of concurrent /scan requests, blocking scan vs the asyncio scan path.
+
+Both variants are served in-process over ASGI against a local stub news
+server. While the scans run, /health is polled every 20 ms; a blocked event loop
+answers it only before and after the scans. Run from the repository root:
+
+    python benchmarks/bench_async_scan.py -c 4 --latency 0.1
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import FastAPI
+
+import api
+from benchmarks.stub_news_server import StubNewsServer
+from sentiment_analysis import NewsSentimentScanner
+
+
+def make_blocking_app():
+    """The previous /scan behaviour: a synchronous scan inside an async handler."""
+    blocking_app = FastAPI()
+
+    @blocking_app.post("/scan")
+    async def scan(request: api.ScanRequest):
+        config = argparse.Namespace(**request.model_dump(), format='json', file_path=None,
+                                    rss_base_url=os.environ["SENTIMENT_RSS_BASE_URL"])
+        return NewsSentimentScanner(config).run(return_json=True)
+
+    @blocking_app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    return blocking_app
+
+
+async def drive(app, concurrency, payload):
+    transport = httpx.ASGITransport(app=app)
+    health_latencies = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def poll_health(stop):
+            while not stop.is_set():
+                start = time.perf_counter()
+                await client.get("/health")
+                health_latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(0.02)
+
+        stop = asyncio.Event()
+        poller = asyncio.create_task(poll_health(stop))
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(client.post("/scan", json=payload) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await poller
+    assert all(response.status_code == 200 for response in responses), [r.text for r in responses]
+    return elapsed, health_latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent /scan throughput against a stub news server.")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="Concurrent /scan requests.")
+    parser.add_argument("-n", "--num_articles", type=int, default=5, help="Articles per query.")
+    parser.add_argument("-w", "--workers", type=int, default=10, help="Workers per scan.")
+    parser.add_argument("--latency", type=float, default=0.1, help="Stub server latency per response (s).")
+    args = parser.parse_args()
+
+    payload = {"market": "gold", "num_articles": args.num_articles, "workers": args.workers, "analyzer": "vader"}
+    with StubNewsServer(latency=args.latency) as stub:
+        os.environ["SENTIMENT_RSS_BASE_URL"] = stub.rss_base_url
+        for label, app in [("blocking run()", make_blocking_app()), ("async run_async()", api.app)]:
+            elapsed, health = asyncio.run(drive(app, args.concurrency, payload))
+            print(f"{label:18s} {args.concurrency} scans in {elapsed:6.2f}s "
+                  f"({args.concurrency / elapsed:5.2f} scans/s); /health answered {len(health):4d} times, "
+                  f"p50 {statistics.median(health) * 1000:6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Article text extraction throughput, worker threads vs the shared process pool.
+
+Every page of a fixed corpus of saved HTML files is parsed with newspaper,
+once through a thread pool (the GIL-bound in-process path) and once through
+the extraction process pool used by `--extract_processes`. The pool is
+warmed up before timing, since scans reuse it. Run from the repository root:
+
+    python benchmarks/bench_extraction.py -w 8
+    python benchmarks/bench_extraction.py --corpus saved_pages/ -w 16
+
+Without `--corpus`, a deterministic corpus of synthetic article pages is
+written to a temporary directory (or to `--save DIR` to keep it).
+"""
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_news_server import StubNewsServer
+from extraction import extract_article, get_extraction_pool, shutdown_extraction_pools
+
+
+def write_corpus(directory, pages, paragraphs):
+    stub = StubNewsServer(paragraphs=paragraphs)
+    try:
+        for article_id in range(pages):
+            with open(os.path.join(directory, f"article_{article_id:04d}.html"), "w") as f:
+                f.write(stub.article_html(article_id))
+    finally:
+        stub.stop()
+
+
+def load_corpus(directory):
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+        with open(path, encoding="utf-8", errors="replace") as f:
+            corpus.append((f"https://example.com/{os.path.basename(path)}", f.read()))
+    return corpus
+
+
+def time_extraction(executor, corpus):
+    start = time.perf_counter()
+    texts = list(executor.map(extract_article, *zip(*corpus)))
+    return time.perf_counter() - start, sum(len(text) for text, _ in texts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark newspaper extraction in threads vs worker processes.")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(), help="Threads or processes.")
+    parser.add_argument("--corpus", type=str, default=None, help="Directory of saved .html pages.")
+    parser.add_argument("--save", type=str, default=None, help="Write the synthetic corpus here instead of a temporary directory.")
+    parser.add_argument("--pages", type=int, default=200, help="Pages in the synthetic corpus.")
+    parser.add_argument("--paragraphs", type=int, default=40, help="Paragraphs per synthetic page.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        directory = args.corpus
+        if directory is None:
+            directory = args.save or tmpdir
+            os.makedirs(directory, exist_ok=True)
+            write_corpus(directory, args.pages, args.paragraphs)
+        corpus = load_corpus(directory)
+
+    size = sum(len(html) for _, html in corpus)
+    print(f"{len(corpus)} pages, {size / 1024 / 1024:.1f} MB of HTML, {args.workers} workers")
+
+    pool = get_extraction_pool(args.workers)
+    list(pool.map(extract_article, *zip(*corpus[:args.workers * 2])))
+    with ThreadPoolExecutor(max_workers=args.workers) as threads:
+        variants = [("threads", threads), ("process pool", pool)]
+        for label, executor in variants:
+            elapsed, chars = time_extraction(executor, corpus)
+            print(f"{label:13s} {elapsed:6.2f}s  {len(corpus) / elapsed:7.1f} pages/s  {chars} chars extracted")
+    shutdown_extraction_pools()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""FinBERT backends: fp32 PyTorch vs int8-quantized vs ONNX Runtime.
+
+Every backend scores the same texts. The report shows its load time (first
+load, which converts and caches the model, and a cached reload), scoring
+throughput, model size and how often its label agrees with the fp32 model.
+Run from the repository root:
+
+    python benchmarks/bench_finbert_backends.py
+    python benchmarks/bench_finbert_backends.py --corpus headlines.txt --backends finbert-int8 -b 32
+
+`--corpus` is a text file with one text per line; by default a small set of
+financial headlines is repeated to `--num_texts`. Converted models go to a
+temporary directory unless `--cache_dir` is given.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from sentiment_engines import FINBERT_MODEL, FinbertEngine, OnnxFinbertEngine, QuantizedFinbertEngine
+
+BACKENDS = {'finbert-int8': QuantizedFinbertEngine, 'finbert-onnx': OnnxFinbertEngine}
+
+SAMPLE_TEXTS = [
+    "Gold prices rallied to a record high as investors sought safety.",
+    "The company beat earnings expectations and raised its full-year guidance.",
+    "Revenue grew 18% year over year on strong demand for cloud services.",
+    "Shares jumped after the regulator approved the merger.",
+    "The central bank cut interest rates, lifting equity markets.",
+    "Net income fell sharply as costs rose faster than sales.",
+    "The firm announced widespread layoffs and a major restructuring charge.",
+    "Silver slumped after stronger-than-expected jobs data boosted the dollar.",
+    "Analysts downgraded the stock, citing weak margins and rising debt.",
+    "The lender warned of higher loan losses in the coming quarters.",
+    "The stock is listed on the New York Stock Exchange.",
+    "The annual shareholder meeting will be held in May.",
+    "The company is headquartered in Zurich and employs 4,000 people.",
+    "Oil futures were little changed in Asian trading on Monday.",
+    "The board will review the dividend policy later this year.",
+    "Copper demand is expected to recover as factories reopen, though risks remain.",
+]
+
+
+def time_load(engine_cls, model_name, cache_dir):
+    start = time.perf_counter()
+    engine = engine_cls(model_name, cache_dir=cache_dir)
+    return engine, time.perf_counter() - start
+
+
+def time_scoring(engine, texts, batch_size, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = engine.score_batch(texts, max_batch_size=batch_size)
+        best = min(best, time.perf_counter() - start)
+    return results, len(texts) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark accelerated FinBERT backends against the fp32 model.")
+    parser.add_argument("--model", type=str, default=FINBERT_MODEL, help="Hugging Face model name or local checkpoint.")
+    parser.add_argument("--backends", type=str, default=','.join(BACKENDS), help="Comma-separated backends to compare.")
+    parser.add_argument("--corpus", type=str, default=None, help="Text file with one text per line.")
+    parser.add_argument("-n", "--num_texts", type=int, default=128, help="Texts scored per run when no corpus is given.")
+    parser.add_argument("-b", "--batch_size", type=int, default=16, help="Maximum texts per forward pass.")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="Timed runs per backend (best is reported).")
+    parser.add_argument("--cache_dir", type=str, default=None, help="Keep converted models here instead of a temporary directory.")
+    args = parser.parse_args()
+
+    if args.corpus:
+        with open(args.corpus) as f:
+            texts = [line.strip() for line in f if line.strip()]
+    else:
+        texts = (SAMPLE_TEXTS * (args.num_texts // len(SAMPLE_TEXTS) + 1))[:args.num_texts]
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache_dir = args.cache_dir or tmpdir
+        reference, load_seconds = time_load(FinbertEngine, args.model, cache_dir)
+        expected, throughput = time_scoring(reference, texts, args.batch_size, args.repeat)
+        print(f"{len(texts)} texts, batch size {args.batch_size}")
+        print(f"{'backend':13s} {'load':>7s} {'cached':>7s} {'texts/s':>8s} {'speedup':>8s} {'size MB':>8s} {'agree':>7s} {'|dpol|':>7s}")
+        print(f"{'finbert':13s} {load_seconds:6.2f}s {'':>7s} {throughput:8.1f} {1.0:7.2f}x "
+              f"{reference.parameter_bytes() / 1024 / 1024:8.1f} {'':>7s} {'':>7s}")
+
+        for name in args.backends.split(','):
+            engine_cls = BACKENDS[name]
+            _, first_load = time_load(engine_cls, args.model, cache_dir)
+            engine, cached_load = time_load(engine_cls, args.model, cache_dir)
+            results, backend_throughput = time_scoring(engine, texts, args.batch_size, args.repeat)
+            agreement = np.mean([label == expected_label for (_, label), (_, expected_label) in zip(results, expected)])
+            polarity_error = np.mean([abs(polarity - expected_polarity)
+                                      for (polarity, _), (expected_polarity, _) in zip(results, expected)])
+            print(f"{name:13s} {first_load:6.2f}s {cached_load:6.2f}s {backend_throughput:8.1f} "
+                  f"{backend_throughput / throughput:7.2f}x {engine.parameter_bytes() / 1024 / 1024:8.1f} "
+                  f"{agreement:7.1%} {polarity_error:7.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""Offline end-to-end benchmark suite for CI.
+
+Starts a local stub news server and scans it through `NewsSentimentScanner.run()`,
+the CLI and the `/scan` API for every combination of the given analyzers,
+`num_articles` and `workers` settings. Each scan runs in a fresh process, so no
+caches or loaded models carry over and peak RSS is measured per scan. The
+report is JSON with, per scenario, scan latency and per-stage latency
+percentiles, throughput and peak RSS. Run from the repository root:
+
+    python benchmarks/bench_suite.py --modes run,cli,api -n 5,10 -w 4,10 -o bench.json
+    python benchmarks/bench_suite.py --baseline bench.json --tolerance 0.25
+
+With `--baseline`, the exit status is 1 if any scenario's throughput falls, or its
+peak RSS grows, by more than `--tolerance` relative to the baseline report.
+
+Stage latencies come from the `timings` block every scan reports, so they are
+available in all three modes; `cli` scan latency is measured end to end,
+including interpreter startup and imports.
+"""
+import argparse
+import asyncio
+import glob
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from benchmarks.stub_news_server import StubNewsServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = ('run', 'cli', 'api')
+
+def percentiles(values):
+    if not values:
+        return None
+    values = np.asarray(values) * 1000
+    return {
+        'count': len(values),
+        'p50_ms': round(float(np.percentile(values, 50)), 2),
+        'p95_ms': round(float(np.percentile(values, 95)), 2),
+        'p99_ms': round(float(np.percentile(values, 99)), 2),
+        'max_ms': round(float(values.max()), 2),
+    }
+
+
+def merge_stages(scans):
+    """Combine the per-scan stage timings: call and error counts add up, latencies are the median across scans."""
+    stages = {}
+    for scan in scans:
+        for stage, timings in scan['stages'].items():
+            stages.setdefault(stage, []).append(timings)
+    merged = {}
+    for stage, runs in stages.items():
+        merged[stage] = {'count': sum(run['count'] for run in runs), 'errors': sum(run['errors'] for run in runs)}
+        for field in ('total_seconds', 'p50_ms', 'p95_ms', 'max_ms'):
+            merged[stage][field] = round(float(np.median([run[field] for run in runs])), 3)
+    return merged
+
+
+def scan_config(scenario, rss_base_url):
+    return argparse.Namespace(
+        market='gold', num_articles=scenario['num_articles'], workers=scenario['workers'], format='json',
+        analyzer=scenario['analyzer'], file_path=None, max_age='7d', rss_base_url=rss_base_url,
+    )
+
+
+def run_child(scenario):
+    """Run one in-process scan and print its timings as JSON (executed in a fresh interpreter)."""
+    from sentiment_engines import registry
+
+    rss_base_url = os.environ['SENTIMENT_RSS_BASE_URL']
+    # Load the model up front: the suite measures scans, not model loading.
+    registry.get(scenario['analyzer'])
+
+    if scenario['mode'] == 'run':
+        from sentiment_analysis import NewsSentimentScanner
+
+        scanner = NewsSentimentScanner(scan_config(scenario, rss_base_url))
+        start = time.perf_counter()
+        results = scanner.run(return_json=True)
+    else:
+        import httpx
+        import api
+
+        async def post_scan():
+            transport = httpx.ASGITransport(app=api.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+                response = await client.post("/scan", json={
+                    'market': 'gold', 'num_articles': scenario['num_articles'],
+                    'workers': scenario['workers'], 'analyzer': scenario['analyzer'],
+                })
+            response.raise_for_status()
+            return response.json()
+
+        start = time.perf_counter()
+        results = asyncio.run(post_scan())
+    elapsed = time.perf_counter() - start
+    print(json.dumps({'seconds': elapsed, 'articles': len(results['articles']), 'stages': results['timings']['stages']}))
+
+
+def wait_with_rusage(command, env):
+    """Run `command`, returning its stdout and peak RSS in bytes."""
+    with tempfile.TemporaryFile() as stdout:
+        process = subprocess.Popen(command, stdout=stdout, stderr=subprocess.DEVNULL, env=env, cwd=ROOT)
+        _, status, rusage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        stdout.seek(0)
+        output = stdout.read().decode()
+    if process.returncode != 0:
+        raise RuntimeError(f"{' '.join(command)} exited with {process.returncode}")
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere.
+    return output, rusage.ru_maxrss if sys.platform == 'darwin' else rusage.ru_maxrss * 1024
+
+
+def run_scan(scenario, rss_base_url):
+    env = dict(os.environ, SENTIMENT_RSS_BASE_URL=rss_base_url)
+    if scenario['mode'] == 'cli':
+        command = [
+            sys.executable, 'sentiment_analysis.py', '-m', 'gold', '-f', 'json', '-a', scenario['analyzer'],
+            '-n', str(scenario['num_articles']), '-w', str(scenario['workers']), '--rss_base_url', rss_base_url,
+        ]
+        start = time.perf_counter()
+        output, peak_rss = wait_with_rusage(command, env)
+        results = json.loads(output)
+        return {'seconds': time.perf_counter() - start, 'articles': len(results['articles']),
+                'stages': results['timings']['stages'], 'peak_rss': peak_rss}
+    output, peak_rss = wait_with_rusage([sys.executable, os.path.abspath(__file__), '--child', json.dumps(scenario)], env)
+    return dict(json.loads(output.splitlines()[-1]), peak_rss=peak_rss)
+
+
+def scenario_key(scenario):
+    return f"{scenario['mode']}/{scenario['analyzer']}/n{scenario['num_articles']}/w{scenario['workers']}"
+
+
+def run_scenario(scenario, rss_base_url, repeat):
+    scans = [run_scan(scenario, rss_base_url) for _ in range(repeat)]
+    seconds = [scan['seconds'] for scan in scans]
+    articles = sum(scan['articles'] for scan in scans)
+    return dict(
+        scenario,
+        key=scenario_key(scenario),
+        runs=repeat,
+        articles_per_scan=round(articles / repeat, 1),
+        scan_latency=percentiles(seconds),
+        throughput_articles_per_s=round(articles / sum(seconds), 2),
+        peak_rss_mb=round(max(scan['peak_rss'] for scan in scans) / 1024 / 1024, 1),
+        stages=merge_stages(scans),
+    )
+
+
+def find_regressions(report, baseline, tolerance):
+    previous = {scenario['key']: scenario for scenario in baseline['scenarios']}
+    regressions = []
+    for scenario in report['scenarios']:
+        old = previous.get(scenario['key'])
+        if old is None:
+            continue
+        if scenario['throughput_articles_per_s'] < old['throughput_articles_per_s'] * (1 - tolerance):
+            regressions.append(f"{scenario['key']}: throughput {scenario['throughput_articles_per_s']} articles/s "
+                               f"vs baseline {old['throughput_articles_per_s']}")
+        if scenario['peak_rss_mb'] > old['peak_rss_mb'] * (1 + tolerance):
+            regressions.append(f"{scenario['key']}: peak RSS {scenario['peak_rss_mb']} MB vs baseline {old['peak_rss_mb']}")
+    return regressions
+
+
+def int_list(value):
+    return [int(v) for v in value.split(',')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite over a local stub news server.")
+    parser.add_argument("--modes", type=str, default=','.join(MODES), help="Comma-separated subset of run,cli,api.")
+    parser.add_argument("-a", "--analyzers", type=str, default="vader", help="Comma-separated analyzers, e.g. vader,finbert.")
+    parser.add_argument("-n", "--num_articles", type=int_list, default=[5], help="Comma-separated articles-per-query settings.")
+    parser.add_argument("-w", "--workers", type=int_list, default=[10], help="Comma-separated worker settings.")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="Scans per scenario.")
+    parser.add_argument("--latency", type=float, default=0.02, help="Base stub latency per response (s).")
+    parser.add_argument("--latency_jitter", type=float, default=0.03, help="Extra uniformly random stub latency (s).")
+    parser.add_argument("--paragraphs", type=str, default="5-40", help="Article size in paragraphs, fixed (20) or a range (5-40).")
+    parser.add_argument("--article_pool", type=int, default=120, help="Distinct articles the stub serves.")
+    parser.add_argument("--corpus", type=str, default=None, help="Directory of recorded .html pages to serve instead of synthetic ones.")
+    parser.add_argument("-o", "--output", type=str, default=None, help="Write the JSON report here as well as to stdout.")
+    parser.add_argument("--baseline", type=str, default=None, help="Earlier report to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression against the baseline.")
+    parser.add_argument("--child", type=str, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return run_child(json.loads(args.child))
+
+    low, _, high = args.paragraphs.partition('-')
+    paragraphs = (int(low), int(high)) if high else int(low)
+    pages = None
+    if args.corpus:
+        pages = []
+        for path in sorted(glob.glob(os.path.join(args.corpus, "*.html"))):
+            with open(path, encoding="utf-8", errors="replace") as f:
+                pages.append(f.read())
+
+    scenarios = [
+        {'mode': mode, 'analyzer': analyzer, 'num_articles': num_articles, 'workers': workers}
+        for mode, analyzer, num_articles, workers in itertools.product(
+            args.modes.split(','), args.analyzers.split(','), args.num_articles, args.workers)
+    ]
+    stub_options = {'article_pool': args.article_pool, 'latency': args.latency,
+                    'latency_jitter': args.latency_jitter, 'paragraphs': paragraphs}
+    with StubNewsServer(items_per_feed=max(args.num_articles), pages=pages, **stub_options) as stub:
+        results = []
+        for scenario in scenarios:
+            print(f"Running {scenario_key(scenario)} x{args.repeat}...", file=sys.stderr)
+            results.append(run_scenario(scenario, stub.rss_base_url, args.repeat))
+
+    report = {
+        'python': sys.version.split()[0],
+        'cpu_count': os.cpu_count(),
+        'stub': dict(stub_options, paragraphs=args.paragraphs, corpus=args.corpus),
+        'scenarios': results,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Micro-benchmark: per-article VADER latency with and without the shared engine.
+
+Run from the repository root:
+
+    python benchmarks/bench_vader.py -n 140
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+from sentiment_engines import get_vader_engine
+
+SAMPLE_TEXT = (
+    "Gold prices rallied to a record high on Tuesday as investors sought safety "
+    "amid fears of a slowing economy. Analysts remain cautious, warning that "
+    "volatility could return if central banks keep rates higher for longer."
+)
+
+
+def per_article_analyzer(texts):
+    for text in texts:
+        SentimentIntensityAnalyzer().polarity_scores(text)
+
+
+def shared_engine(texts):
+    engine = get_vader_engine()
+    for text in texts:
+        engine.score(text)
+
+
+def shared_engine_batch(texts):
+    get_vader_engine().score_batch(texts)
+
+
+def time_per_article(func, texts, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(texts)
+        best = min(best, time.perf_counter() - start)
+    return best / len(texts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark VADER analyzer reuse.")
+    parser.add_argument("-n", "--num_articles", type=int, default=140, help="Articles per timed run.")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="Timed runs per variant (best is reported).")
+    args = parser.parse_args()
+
+    texts = [SAMPLE_TEXT] * args.num_articles
+    get_vader_engine()  # the shared engine is loaded once per process, outside the timed region
+
+    baseline = time_per_article(per_article_analyzer, texts, args.repeat)
+    print(f"new analyzer per article: {baseline * 1000:8.3f} ms/article")
+    for label, func in [("shared engine", shared_engine), ("shared engine, batch", shared_engine_batch)]:
+        latency = time_per_article(func, texts, args.repeat)
+        print(f"{label + ':':25s} {latency * 1000:8.3f} ms/article ({baseline / latency:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
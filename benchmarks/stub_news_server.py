@@ -0,0 +1,171 @@
+"""Local stand-in for Google News RSS search and publisher article pages.
+
+`/rss/search?q=...` returns an RSS feed whose items link to `/article/<id>`
+pages on the same server, and answers conditional requests carrying its
+ETag with 304 Not Modified. Item ids are drawn from a fixed pool per query, so
+overlapping queries return overlapping articles the way Google News does.
+"""
+import hashlib
+import random
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from xml.sax.saxutils import escape
+
+HEADLINE_WORDS = (
+    "gold silver copper oil bonds stocks dollar yields miners traders investors banks "
+    "rally slump surge slide rebound retreat climb tumble steady gains losses outlook "
+    "inflation demand supply rates fed china europe tariffs output forecast record"
+).split()
+
+PARAGRAPHS = [
+    "Gold prices rallied to a record high as investors sought safety amid fears of a slowing economy.",
+    "Analysts remain cautious, warning that volatility could return if central banks keep rates higher for longer.",
+    "Mining shares slumped after the company reported a major loss and announced widespread layoffs.",
+    "The metal is traded on exchanges in London, New York and Shanghai throughout the day.",
+    "Strong growth in central bank purchases continued to support demand, according to the latest report.",
+]
+
+
+class StubNewsServer:
+    """Threaded HTTP server serving synthetic feeds and article pages.
+
+    `latency` (seconds) delays every response, plus a uniformly random extra
+    of up to `latency_jitter`; `article_pool` bounds the number of distinct
+    articles so that queries overlap. `paragraphs` sets article size, either
+    fixed or as a `(min, max)` range drawn per article. `pages`, a list of
+    recorded HTML documents, replaces the synthetic article pages.
+    """
+
+    def __init__(self, items_per_feed=10, article_pool=60, latency=0.0, paragraphs=20, host='127.0.0.1', port=0,
+                 latency_jitter=0.0, pages=None):
+        self.items_per_feed = items_per_feed
+        self.article_pool = article_pool
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.paragraphs = paragraphs
+        self.pages = pages
+        self.requests = {'rss': 0, 'not_modified': 0, 'article': 0}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def rss_base_url(self):
+        return f"{self.base_url}/rss/search"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-news-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def article_ids(self, query):
+        seed = int(hashlib.sha256(query.encode()).hexdigest(), 16)
+        return [(seed + i * 7) % self.article_pool for i in range(self.items_per_feed)]
+
+    def rss(self, query):
+        items = []
+        for article_id in self.article_ids(query):
+            items.append(
+                f"<item><title>{escape(self.title(article_id))} - Stub Wire</title>"
+                f"<link>{self.base_url}/article/{article_id}</link>"
+                f"<pubDate>{formatdate(usegmt=True)}</pubDate>"
+                f"<source url=\"{self.base_url}\">Stub Wire</source></item>"
+            )
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+            f"<title>{escape(query)}</title>{''.join(items)}</channel></rss>"
+        )
+
+    def title(self, article_id):
+        digest = hashlib.sha256(str(article_id).encode()).digest()
+        words = [HEADLINE_WORDS[b % len(HEADLINE_WORDS)] for b in digest[:7]]
+        return f"{' '.join(words).capitalize()} ({article_id})"
+
+    def paragraph_count(self, article_id):
+        if isinstance(self.paragraphs, int):
+            return self.paragraphs
+        low, high = self.paragraphs
+        return low + int(hashlib.sha256(f"size{article_id}".encode()).hexdigest(), 16) % (high - low + 1)
+
+    def article_html(self, article_id):
+        if self.pages:
+            return self.pages[article_id % len(self.pages)]
+        body = "".join(
+            f"<p>{escape(PARAGRAPHS[(article_id + i) % len(PARAGRAPHS)])}</p>"
+            for i in range(self.paragraph_count(article_id))
+        )
+        return (
+            f"<html><head><title>{escape(self.title(article_id))}</title></head><body>"
+            f"<article><h1>{escape(self.title(article_id))}</h1>{body}</article></body></html>"
+        )
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                if server.latency or server.latency_jitter:
+                    time.sleep(server.latency + random.uniform(0, server.latency_jitter))
+                if parts.path == '/rss/search':
+                    query = parse_qs(parts.query).get('q', [''])[0]
+                    body = server.rss(query)
+                    etag = '"%s"' % hashlib.sha256(query.encode()).hexdigest()[:16]
+                    if self.headers.get('If-None-Match') == etag:
+                        with server._lock:
+                            server.requests['not_modified'] += 1
+                        self.send_response(304)
+                        self.send_header('ETag', etag)
+                        self.end_headers()
+                        return
+                    self._send(body, 'application/rss+xml', 'rss', {'ETag': etag})
+                elif parts.path.startswith('/article/'):
+                    self._send(server.article_html(int(parts.path.rsplit('/', 1)[1])), 'text/html', 'article')
+                else:
+                    self.send_error(404)
+
+            def _send(self, body, content_type, kind, headers=None):
+                with server._lock:
+                    server.requests[kind] += 1
+                data = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == "__main__":
+    with StubNewsServer(latency=0.05) as stub:
+        print(f"Stub news server on {stub.rss_base_url} (Ctrl+C to stop)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,336 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import closing
+
+DEFAULT_CACHE_TTL = 3600
+DEFAULT_CACHE_MAX_MB = 256
+DEFAULT_SCORE_CACHE_ENTRIES = 50000
+DEFAULT_FEED_TTL = 300
+EVICT_LOW_WATER = 0.9
+EVICT_BATCH = 256
+
+
+class SqliteStore:
+    """Base for caches kept in a single SQLite file shared by threads and processes.
+
+    Every operation opens its own short-lived connection, so instances can be
+    used from any thread; WAL mode plus a busy timeout lets several scanner
+    processes and API workers read and write the same file concurrently.
+    """
+    schema = ""
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.schema)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+
+class ContentCache(SqliteStore):
+    """Extracted article text and metadata keyed by canonical URL.
+
+    Entries older than `ttl` seconds are treated as misses. Triggers keep a
+    running byte total in `content_stats`, so a `put` only checks one row.
+    Once the total exceeds `max_bytes`, expired entries and then the least
+    recently read ones are deleted in batches until it is back under 90% of
+    the cap. `hits` and `misses` count lookups made through this instance only.
+    """
+    schema = """
+        CREATE TABLE IF NOT EXISTS articles (
+            url TEXT PRIMARY KEY,
+            text TEXT NOT NULL,
+            metadata TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            fetched_at REAL NOT NULL,
+            accessed_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS articles_accessed_at ON articles (accessed_at);
+        CREATE INDEX IF NOT EXISTS articles_fetched_at ON articles (fetched_at);
+        CREATE TABLE IF NOT EXISTS content_stats (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL);
+        INSERT OR IGNORE INTO content_stats (id, bytes) SELECT 0, COALESCE(SUM(size), 0) FROM articles;
+        CREATE TRIGGER IF NOT EXISTS articles_insert AFTER INSERT ON articles BEGIN
+            UPDATE content_stats SET bytes = bytes + new.size WHERE id = 0;
+        END;
+        CREATE TRIGGER IF NOT EXISTS articles_update AFTER UPDATE OF size ON articles BEGIN
+            UPDATE content_stats SET bytes = bytes + new.size - old.size WHERE id = 0;
+        END;
+        CREATE TRIGGER IF NOT EXISTS articles_delete AFTER DELETE ON articles BEGIN
+            UPDATE content_stats SET bytes = bytes - old.size WHERE id = 0;
+        END;
+    """
+
+    def __init__(self, path, ttl=DEFAULT_CACHE_TTL, max_bytes=DEFAULT_CACHE_MAX_MB * 1024 * 1024):
+        super().__init__(path)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._counter_lock = threading.Lock()
+
+    def get(self, url):
+        """Return `(text, metadata)` for a fresh entry, or None."""
+        now = time.time()
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT text, metadata FROM articles WHERE url = ? AND fetched_at >= ?", (url, now - self.ttl)
+            ).fetchone()
+            if row is not None:
+                conn.execute("UPDATE articles SET accessed_at = ? WHERE url = ?", (now, url))
+        with self._counter_lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def put(self, url, text, metadata=None):
+        now = time.time()
+        size = len(text.encode('utf-8'))
+        with closing(self._connect()) as conn:
+            # An upsert (not INSERT OR REPLACE) so the update trigger keeps the byte total right.
+            conn.execute(
+                "INSERT INTO articles (url, text, metadata, size, fetched_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (url) DO UPDATE SET text = excluded.text, metadata = excluded.metadata, "
+                "size = excluded.size, fetched_at = excluded.fetched_at, accessed_at = excluded.accessed_at",
+                (url, text, json.dumps(metadata or {}), size, now, now),
+            )
+            if self._total_bytes(conn) > self.max_bytes:
+                self._evict(conn, now)
+
+    def _total_bytes(self, conn):
+        return conn.execute("SELECT bytes FROM content_stats WHERE id = 0").fetchone()[0]
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM articles WHERE fetched_at < ?", (now - self.ttl,))
+        target = self.max_bytes * EVICT_LOW_WATER
+        total = self._total_bytes(conn)
+        while total > target:
+            victims = conn.execute(
+                "SELECT url, size FROM articles ORDER BY accessed_at LIMIT ?", (EVICT_BATCH,)
+            ).fetchall()
+            if not victims:
+                return
+            batch, freed = [], 0
+            for url, size in victims:
+                batch.append((url,))
+                freed += size
+                if freed >= total - target:
+                    break
+            conn.executemany("DELETE FROM articles WHERE url = ?", batch)
+            total = self._total_bytes(conn)
+
+    def stats(self):
+        with closing(self._connect()) as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+            size = self._total_bytes(conn)
+        return {'hits': self.hits, 'misses': self.misses, 'entries': entries, 'bytes': size}
+
+
+class FeedCache(SqliteStore):
+    """Parsed feed entries per feed URL, with the ETag/Last-Modified validators to revalidate them.
+
+    `get` returns the cached record regardless of age; callers serve it
+    directly while `is_fresh` and otherwise send a conditional request with
+    its validators. `hits`, `revalidated` and `misses` count fresh serves,
+    304 responses and full downloads for this instance.
+    """
+    schema = """
+        CREATE TABLE IF NOT EXISTS feeds (
+            url TEXT PRIMARY KEY,
+            etag TEXT,
+            modified TEXT,
+            entries TEXT NOT NULL,
+            fetched_at REAL NOT NULL
+        );
+    """
+
+    def __init__(self, path, ttl=DEFAULT_FEED_TTL):
+        super().__init__(path)
+        self.ttl = ttl
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._counter_lock = threading.Lock()
+
+    def get(self, url):
+        """Return a dict with 'etag', 'modified', 'entries' and 'fetched_at', or None."""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT etag, modified, entries, fetched_at FROM feeds WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        return {'etag': row[0], 'modified': row[1], 'entries': json.loads(row[2]), 'fetched_at': row[3]}
+
+    def is_fresh(self, record):
+        return record is not None and record['fetched_at'] >= time.time() - self.ttl
+
+    def put(self, url, entries, etag=None, modified=None):
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO feeds (url, etag, modified, entries, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (url, etag, modified, json.dumps(entries), time.time()),
+            )
+        self._count('misses')
+
+    def touch(self, url):
+        """Mark a cached feed as fresh again after a 304 Not Modified."""
+        with closing(self._connect()) as conn:
+            conn.execute("UPDATE feeds SET fetched_at = ? WHERE url = ?", (time.time(), url))
+        self._count('revalidated')
+
+    def record_hit(self):
+        self._count('hits')
+
+    def _count(self, name):
+        with self._counter_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def stats(self):
+        return {'hits': self.hits, 'revalidated': self.revalidated, 'misses': self.misses}
+
+
+def score_key(engine, text, variant=''):
+    """Cache key for `text` scored by `engine`: (analyzer name, model revision, SHA-256 of the text).
+
+    `variant` distinguishes scoring options that change the result, such as chunk pooling.
+    """
+    return engine.name, engine.revision + variant, hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class ScoreStore(SqliteStore):
+    """On-disk tier of the score cache. Scores are deterministic per model revision, so entries never expire."""
+    schema = """
+        CREATE TABLE IF NOT EXISTS scores (
+            analyzer TEXT NOT NULL,
+            revision TEXT NOT NULL,
+            digest TEXT NOT NULL,
+            polarity REAL NOT NULL,
+            sentiment TEXT NOT NULL,
+            PRIMARY KEY (analyzer, revision, digest)
+        );
+    """
+
+    def get_many(self, keys):
+        found = {}
+        with closing(self._connect()) as conn:
+            for key in keys:
+                row = conn.execute(
+                    "SELECT polarity, sentiment FROM scores WHERE analyzer = ? AND revision = ? AND digest = ?", key
+                ).fetchone()
+                if row is not None:
+                    found[key] = (row[0], row[1])
+        return found
+
+    def put_many(self, items):
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT OR REPLACE INTO scores (analyzer, revision, digest, polarity, sentiment) VALUES (?, ?, ?, ?, ?)",
+                [key + result for key, result in items],
+            )
+            conn.execute("COMMIT")
+
+
+class ScoreCache:
+    """Process-wide LRU of `(polarity, sentiment)` results, with an optional on-disk tier.
+
+    `get_or_compute` guarantees each key is computed at most once: keys that
+    are already being scored by another thread are waited on rather than
+    recomputed, and repeated keys within one call are scored once.
+    """
+
+    def __init__(self, max_entries=DEFAULT_SCORE_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._memory)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+
+    def get_or_compute(self, keys, texts, score_batch, store=None, stats=None):
+        """Return a result per key, calling `score_batch` only for texts no cache tier holds.
+
+        `stats`, if given, is a dict whose 'hits', 'misses' and 'coalesced'
+        counts are incremented for this call.
+        """
+        results = [None] * len(keys)
+        owned = OrderedDict()
+        waiting = []
+        counts = {'hits': 0, 'misses': 0, 'coalesced': 0}
+        with self._lock:
+            for i, key in enumerate(keys):
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    results[i] = self._memory[key]
+                    counts['hits'] += 1
+                elif key in owned:
+                    waiting.append((i, owned[key][1]))
+                    counts['coalesced'] += 1
+                elif key in self._inflight:
+                    waiting.append((i, self._inflight[key]))
+                    counts['coalesced'] += 1
+                else:
+                    future = Future()
+                    self._inflight[key] = future
+                    owned[key] = (i, future)
+
+        try:
+            if owned and store is not None:
+                for key, result in store.get_many(list(owned)).items():
+                    i, future = owned.pop(key)
+                    results[i] = result
+                    counts['hits'] += 1
+                    self._fulfil(key, future, result)
+            if owned:
+                computed = score_batch([texts[i] for i, _ in owned.values()])
+                counts['misses'] += len(owned)
+                if store is not None:
+                    store.put_many(list(zip(owned, computed)))
+                for (key, (i, future)), result in zip(list(owned.items()), computed):
+                    results[i] = result
+                    self._fulfil(key, future, result)
+                owned.clear()
+        except Exception as e:
+            with self._lock:
+                for key, (_, future) in owned.items():
+                    self._inflight.pop(key, None)
+                    future.set_exception(e)
+            raise
+
+        for i, future in waiting:
+            results[i] = future.result()
+        if stats is not None:
+            for name, count in counts.items():
+                stats[name] = stats.get(name, 0) + count
+        return results
+
+    def _fulfil(self, key, future, result):
+        with self._lock:
+            self._memory[key] = result
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+            self._inflight.pop(key, None)
+        future.set_result(result)
+
+
+score_cache = ScoreCache()
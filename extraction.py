@@ -0,0 +1,72 @@
+import atexit
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+
+def article_metadata(url, article):
+    """Metadata stored next to an article's text in the content cache."""
+    return {
+        'source_url': url,
+        'title': article.title,
+        'authors': article.authors,
+        'publish_date': article.publish_date.isoformat() if article.publish_date else None,
+    }
+
+
+def extract_article(url, html):
+    """Parse downloaded `html` with newspaper and return `(text, metadata)`.
+
+    Runs in extraction worker processes, so only the HTML goes in and only
+    the extracted text and a few metadata fields come back.
+    """
+    from newspaper import Article
+
+    article = Article(url)
+    article.download(input_html=html)
+    article.parse()
+    return article.text, article_metadata(url, article)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_extraction_pool(processes):
+    """Return the process-wide pool of `processes` extraction workers, starting it on first use.
+
+    Workers are spawned rather than forked, since the scanner forks from a
+    process that already runs worker threads and may hold a loaded model.
+    """
+    with _pools_lock:
+        pool = _pools.get(processes)
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn'))
+            _pools[processes] = pool
+        return pool
+
+
+def replace_broken_pool(processes, pool):
+    """Drop `pool`, broken because a worker died (OOM, segfault, kill), and return a fresh pool of `processes`.
+
+    A broken ProcessPoolExecutor fails every later submit, so it must not
+    stay cached. Callers racing on the same broken pool share one replacement.
+    """
+    with _pools_lock:
+        broken = _pools.get(processes) is pool
+        if broken:
+            del _pools[processes]
+    if broken:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return get_extraction_pool(processes)
+
+
+def shutdown_extraction_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+atexit.register(shutdown_extraction_pools)
@@ -0,0 +1,264 @@
+import asyncio
+import email.message
+import io
+import random
+import threading
+import time
+import urllib.request
+import urllib.response
+from urllib.parse import urlsplit
+
+import httpx
+
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+DEFAULT_HTTP_TIMEOUT = 10.0
+DEFAULT_PER_HOST_LIMIT = 4
+DEFAULT_RATE_LIMIT = 0.0
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_MAX_RESPONSE_MB = 5
+DEFAULT_MAX_CONNECTIONS = 32
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8.0
+
+
+class ResponseTooLarge(httpx.HTTPError):
+    """Raised when a response body exceeds the session's `max_bytes`."""
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average, in bursts of up to `burst`.
+
+    `reserve` never blocks: it takes a token (going into debt if none are left)
+    and returns how long the caller must wait before using it, so the same
+    bucket can pace both threads (`time.sleep`) and coroutines (`asyncio.sleep`).
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+def backoff_delay(attempt, response=None, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+    """Seconds to wait before retry number `attempt` (0-based): full jitter, or the server's Retry-After."""
+    retry_after = response.headers.get('retry-after') if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), cap)
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def _host(url):
+    return urlsplit(url).hostname or ''
+
+
+class _SessionBase:
+    def __init__(self, timeout=DEFAULT_HTTP_TIMEOUT, per_host_limit=DEFAULT_PER_HOST_LIMIT, rate_limit=DEFAULT_RATE_LIMIT,
+                 max_retries=DEFAULT_MAX_RETRIES, max_bytes=DEFAULT_MAX_RESPONSE_MB * 1024 * 1024,
+                 max_connections=DEFAULT_MAX_CONNECTIONS):
+        # A zero-slot semaphore would make the first request to every host wait forever.
+        if per_host_limit < 1:
+            raise ValueError(f"per_host_limit must be at least 1, got {per_host_limit}")
+        self.timeout = timeout
+        self.per_host_limit = per_host_limit
+        self.rate_limit = rate_limit
+        self.max_retries = max_retries
+        self.max_bytes = max_bytes
+        self.max_connections = max_connections
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _client_options(self):
+        return {
+            'limits': httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+            'timeout': httpx.Timeout(self.timeout),
+            'headers': {'User-Agent': USER_AGENT},
+            'follow_redirects': True,
+        }
+
+    def _rate_delay(self, host):
+        if not self.rate_limit:
+            return 0.0
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate_limit)
+        return bucket.reserve()
+
+    def _check_length(self, response):
+        length = response.headers.get('content-length')
+        if length and length.isdigit() and int(length) > self.max_bytes:
+            raise ResponseTooLarge(f"Response of {length} bytes exceeds the {self.max_bytes} byte limit")
+
+    def _collect(self, response, chunks, size):
+        if size > self.max_bytes:
+            raise ResponseTooLarge(f"Response body exceeds the {self.max_bytes} byte limit")
+        # The body is already decoded, so drop the headers that describe the encoded form.
+        headers = [(k, v) for k, v in response.headers.multi_items() if k not in ('content-encoding', 'content-length')]
+        return httpx.Response(response.status_code, headers=headers, content=b''.join(chunks), request=response.request)
+
+    def _should_retry(self, attempt, response=None):
+        return attempt < self.max_retries and (response is None or response.status_code in RETRY_STATUSES)
+
+
+class HttpSession(_SessionBase):
+    """Pooled, thread-safe HTTP client shared by feed fetches and article downloads.
+
+    Connections are kept alive across requests and threads. Each host gets at
+    most `per_host_limit` concurrent requests and, with `rate_limit` set, a
+    token bucket of that many requests per second. Connection errors, timeouts
+    and 429/5xx responses are retried up to `max_retries` times with jittered
+    exponential backoff (or the server's Retry-After), and bodies larger than
+    `max_bytes` are abandoned with `ResponseTooLarge` instead of being read.
+    """
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.client = httpx.Client(**self._client_options())
+        self._host_slots = {}
+
+    def close(self):
+        self.client.close()
+
+    def _slots(self, host):
+        with self._lock:
+            slots = self._host_slots.get(host)
+            if slots is None:
+                slots = self._host_slots[host] = threading.BoundedSemaphore(self.per_host_limit)
+        return slots
+
+    def get(self, url, headers=None):
+        """GET `url` and return the fully read `httpx.Response`; only the final attempt's errors are raised."""
+        host = _host(url)
+        attempt = 0
+        while True:
+            time.sleep(self._rate_delay(host))
+            try:
+                with self._slots(host):
+                    response = self._read(url, headers)
+            except httpx.TransportError:
+                if not self._should_retry(attempt):
+                    raise
+                response = None
+            if response is not None and not self._should_retry(attempt, response):
+                return response
+            time.sleep(backoff_delay(attempt, response))
+            attempt += 1
+
+    def _read(self, url, headers):
+        with self.client.stream('GET', url, headers=headers) as response:
+            self._check_length(response)
+            chunks, size = [], 0
+            for chunk in response.iter_bytes():
+                chunks.append(chunk)
+                size += len(chunk)
+                if size > self.max_bytes:
+                    break
+            return self._collect(response, chunks, size)
+
+    def urllib_handler(self):
+        """A urllib handler that sends feedparser's requests through this session."""
+        return _SessionHandler(self)
+
+
+class _HandlerResponse(urllib.response.addinfourl):
+    # feedparser assigns `status` on error responses, which addinfourl only exposes read-only.
+    status = None
+
+
+class _SessionHandler(urllib.request.BaseHandler):
+    # Run before urllib's own HTTP(S)Handler, which then never opens a connection.
+    handler_order = 100
+
+    def __init__(self, session):
+        self.session = session
+
+    def http_open(self, request):
+        response = self.session.get(request.full_url, headers=dict(request.header_items()))
+        headers = email.message.Message()
+        for name, value in response.headers.multi_items():
+            headers[name] = value
+        result = _HandlerResponse(io.BytesIO(response.content), headers, str(response.url), response.status_code)
+        result.status = response.status_code
+        result.msg = response.reason_phrase
+        return result
+
+    https_open = http_open
+
+
+class AsyncHttpSession(_SessionBase):
+    """Asyncio counterpart of `HttpSession` over an `httpx.AsyncClient`.
+
+    Pass `client` to share an existing client's connection pool; the session
+    then leaves closing it to the caller. Per-host limits are asyncio
+    semaphores, so a session must stay on the event loop that first used it.
+    """
+
+    def __init__(self, client=None, **options):
+        super().__init__(**options)
+        self._own_client = client is None
+        self.client = client if client is not None else httpx.AsyncClient(**self._client_options())
+        self._host_slots = {}
+
+    async def aclose(self):
+        if self._own_client:
+            await self.client.aclose()
+
+    def _slots(self, host):
+        slots = self._host_slots.get(host)
+        if slots is None:
+            slots = self._host_slots[host] = asyncio.Semaphore(self.per_host_limit)
+        return slots
+
+    async def get(self, url, headers=None):
+        host = _host(url)
+        attempt = 0
+        while True:
+            await asyncio.sleep(self._rate_delay(host))
+            try:
+                async with self._slots(host):
+                    response = await self._read(url, headers)
+            except httpx.TransportError:
+                if not self._should_retry(attempt):
+                    raise
+                response = None
+            if response is not None and not self._should_retry(attempt, response):
+                return response
+            await asyncio.sleep(backoff_delay(attempt, response))
+            attempt += 1
+
+    async def _read(self, url, headers):
+        async with self.client.stream('GET', url, headers=headers) as response:
+            self._check_length(response)
+            chunks, size = [], 0
+            async for chunk in response.aiter_bytes():
+                chunks.append(chunk)
+                size += len(chunk)
+                if size > self.max_bytes:
+                    break
+            return self._collect(response, chunks, size)
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(**options):
+    """Return the process-wide `HttpSession` for these options, creating it on first use."""
+    key = tuple(sorted(options.items()))
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = _sessions[key] = HttpSession(**options)
+        return session
@@ -0,0 +1,161 @@
+import asyncio
+import time
+import uuid
+
+from metrics import CACHE_EVENTS
+
+DEFAULT_JOB_WORKERS = 2
+DEFAULT_RESULT_TTL = 60
+DEFAULT_JOB_RETENTION = 3600
+DEFAULT_MAX_JOBS = 1000
+
+
+class JobQueueFull(RuntimeError):
+    """Raised by `ScanJobQueue.submit` when `max_jobs` jobs are still queued or running."""
+
+
+class ScanJob:
+    """One submitted scan: its status, timestamps and, once finished, its result or error.
+
+    The result is dropped once it is older than the queue's `result_ttl`;
+    the job then reports `result_expired` instead.
+    """
+
+    def __init__(self, key):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = 'queued'
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.result_expired = False
+        self.error = None
+        self.task = None
+
+    @property
+    def finished(self):
+        return self.status in ('done', 'failed')
+
+    def to_dict(self, include_result=True):
+        job = {
+            'job_id': self.id,
+            'status': self.status,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+        if self.error is not None:
+            job['error'] = self.error
+        if self.result_expired:
+            job['result_expired'] = True
+        elif include_result and self.status == 'done':
+            job['result'] = self.result
+        return job
+
+
+class ScanJobQueue:
+    """In-process queue running scan jobs on the event loop, at most `workers` at a time.
+
+    Jobs are keyed by their scan options. Submitting a key whose job is still
+    queued or running returns that job instead of starting another scan, and a
+    key whose job succeeded within `result_ttl` seconds gets the finished job
+    back without scanning again. Results are kept for `result_ttl` seconds;
+    after that a finished job keeps only its status, and it is forgotten after
+    `retention` seconds. At most `max_jobs` jobs are kept: the oldest finished
+    ones go first, and `submit` raises JobQueueFull if all are unfinished.
+    """
+
+    def __init__(self, workers=DEFAULT_JOB_WORKERS, result_ttl=DEFAULT_RESULT_TTL, retention=DEFAULT_JOB_RETENTION,
+                 max_jobs=DEFAULT_MAX_JOBS):
+        self.workers = workers
+        self.result_ttl = result_ttl
+        self.retention = max(retention, result_ttl)
+        self.max_jobs = max_jobs
+        self._semaphore = None
+        self._jobs = {}
+        self._by_key = {}
+
+    def submit(self, key, run):
+        """Return `(job, reused)` for `key`, starting `run()` (a coroutine function) only if no job can be reused."""
+        self._expire()
+        job = self._by_key.get(key)
+        if job is not None and not job.finished:
+            CACHE_EVENTS.inc(cache='scan_jobs', result='coalesced')
+            return job, True
+        if job is not None and job.status == 'done' and not job.result_expired:
+            CACHE_EVENTS.inc(cache='scan_jobs', result='hit')
+            return job, True
+        self._trim(self.max_jobs - 1)
+        if len(self._jobs) >= self.max_jobs:
+            raise JobQueueFull(f"{len(self._jobs)} scan jobs are already queued or running")
+        CACHE_EVENTS.inc(cache='scan_jobs', result='miss')
+        job = ScanJob(key)
+        self._jobs[job.id] = job
+        self._by_key[key] = job
+        job.task = asyncio.create_task(self._run(job, run))
+        return job, False
+
+    def get(self, job_id):
+        self._expire()
+        return self._jobs.get(job_id)
+
+    def stats(self):
+        statuses = [job.status for job in self._jobs.values()]
+        return {status: statuses.count(status) for status in ('queued', 'running', 'done', 'failed')}
+
+    async def aclose(self):
+        """Cancel unfinished jobs, e.g. on shutdown."""
+        tasks = [job.task for job in self._jobs.values() if not job.finished]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, job, run):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.workers)
+        try:
+            async with self._semaphore:
+                job.status = 'running'
+                job.started_at = time.time()
+                job.result = await run()
+                job.status = 'done'
+        except asyncio.CancelledError:
+            job.status = 'failed'
+            job.error = 'Cancelled'
+            raise
+        except Exception as e:
+            job.status = 'failed'
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            # Free results and old jobs on time even if no further requests arrive.
+            loop = asyncio.get_running_loop()
+            loop.call_later(self.result_ttl, self._expire)
+            loop.call_later(self.retention, self._expire)
+            self._expire()
+
+    def _expire(self):
+        now = time.time()
+        for job in list(self._jobs.values()):
+            if not job.finished:
+                continue
+            age = now - job.finished_at
+            if age >= self.retention:
+                self._forget(job)
+            elif age >= self.result_ttl and not job.result_expired:
+                job.result = None
+                job.result_expired = True
+        self._trim(self.max_jobs)
+
+    def _trim(self, limit):
+        """Forget the oldest finished jobs until at most `limit` jobs are kept."""
+        excess = len(self._jobs) - limit
+        if excess > 0:
+            for job in [job for job in self._jobs.values() if job.finished][:excess]:
+                self._forget(job)
+
+    def _forget(self, job):
+        del self._jobs[job.id]
+        if self._by_key.get(job.key) is job:
+            del self._by_key[job.key]
@@ -0,0 +1,224 @@
+import bisect
+import cProfile
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{value}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_value(key, value))
+        return lines
+
+    def _render_value(self, key, value):
+        return [f"{self.name}{_format_labels(self.labels, key)} {value}"]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total, observations = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                counts[index] += 1
+            self._values[key] = (counts, total + value, observations + 1)
+
+    def _render_value(self, key, value):
+        counts, total, observations = value
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{_format_labels(self.labels + ('le',), key + (bound,))} {cumulative}")
+        lines.append(f"{self.name}_bucket{_format_labels(self.labels + ('le',), key + ('+Inf',))} {observations}")
+        lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {total}")
+        lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {observations}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-wide metrics rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+STAGE_SECONDS = metrics.register(Histogram(
+    'sentiment_stage_seconds', 'Time spent per call in each scan stage.', labels=('stage',)))
+STAGE_ERRORS = metrics.register(Counter(
+    'sentiment_stage_errors_total', 'Failed calls per scan stage.', labels=('stage',)))
+STAGE_IN_FLIGHT = metrics.register(Gauge(
+    'sentiment_stage_in_flight', 'Calls currently running per scan stage.', labels=('stage',)))
+CACHE_EVENTS = metrics.register(Counter(
+    'sentiment_cache_events_total', 'Cache lookups by cache and result.', labels=('cache', 'result')))
+SCANS = metrics.register(Counter(
+    'sentiment_scans_total', 'Completed scans.'))
+
+
+class StageTimer:
+    """Per-scan stage timings that also feed the process-wide stage metrics.
+
+    `stage(name)` times a block: the call is counted in flight while it runs,
+    its duration is observed in `sentiment_stage_seconds`, and a block that
+    raises (or is marked with `error(name)`) counts as a stage error.
+    """
+
+    def __init__(self):
+        self._durations = {}
+        self._errors = {}
+        self._started = None
+        self._lock = threading.Lock()
+
+    def begin(self):
+        if self._started is None:
+            self._started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        STAGE_IN_FLIGHT.inc(stage=name)
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.error(name)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            STAGE_IN_FLIGHT.dec(stage=name)
+            STAGE_SECONDS.observe(elapsed, stage=name)
+            with self._lock:
+                self._durations.setdefault(name, []).append(elapsed)
+
+    def error(self, name):
+        STAGE_ERRORS.inc(stage=name)
+        with self._lock:
+            self._errors[name] = self._errors.get(name, 0) + 1
+
+    def to_dict(self):
+        import numpy as np
+
+        with self._lock:
+            durations = {name: np.asarray(values) * 1000 for name, values in self._durations.items()}
+            errors = dict(self._errors)
+        stages = {}
+        for name, values in durations.items():
+            stages[name] = {
+                'count': len(values),
+                'errors': errors.get(name, 0),
+                'total_seconds': round(float(values.sum()) / 1000, 3),
+                'p50_ms': round(float(np.percentile(values, 50)), 2),
+                'p95_ms': round(float(np.percentile(values, 95)), 2),
+                'max_ms': round(float(values.max()), 2),
+            }
+        total = time.perf_counter() - self._started if self._started is not None else 0.0
+        return {'total_seconds': round(total, 3), 'stages': stages}
+
+
+def timed(stage):
+    """Method decorator that runs the call inside `self.timer.stage(stage)`; works on coroutines too."""
+    def decorator(method):
+        if inspect.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def wrapper(self, *args, **kwargs):
+                with self.timer.stage(stage):
+                    return await method(self, *args, **kwargs)
+        else:
+            @functools.wraps(method)
+            def wrapper(self, *args, **kwargs):
+                with self.timer.stage(stage):
+                    return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def profiled(profiler, path):
+    """Profile the block with 'cprofile' (pstats file at `path`) or 'pyinstrument' (HTML report at `path`)."""
+    if profiler == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise RuntimeError("pyinstrument is not installed; run `pip install pyinstrument` or use --profile cprofile")
+        profile = Profiler()
+        profile.start()
+        try:
+            yield
+        finally:
+            profile.stop()
+            with open(path, 'w') as f:
+                f.write(profile.output_html())
+        return
+
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        profile.dump_stats(path)
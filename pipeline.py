@@ -0,0 +1,143 @@
+import queue
+import threading
+import time
+
+DEFAULT_QUEUE_SIZE = 32
+
+_DONE = object()
+_POLL_INTERVAL = 0.1
+
+
+class Stage:
+    def __init__(self, name, func, workers, maxsize, batch_size=None, batch_wait=0.0):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.queue = queue.Queue(maxsize)
+        self.running = 0
+        self.lock = threading.Lock()
+
+
+class Pipeline:
+    """Chain of worker-thread stages connected by bounded queues.
+
+    Every stage runs `func` on its own pool of `workers` threads and passes each
+    value `func` returns on to the next stage, so an item moves downstream as
+    soon as it is ready instead of waiting for the rest of its phase. Stage
+    queues hold at most `maxsize` items: a slow stage blocks the threads feeding
+    it, which keeps memory bounded however many items the first stage produces.
+
+    `func` is called with one item and returns an iterable of results. A stage
+    added with `batch_size` instead receives a list of up to `batch_size` items,
+    collected for at most `batch_wait` seconds after the first one arrived.
+    """
+
+    def __init__(self, maxsize=DEFAULT_QUEUE_SIZE):
+        self.maxsize = maxsize
+        self._stages = []
+        self._output = queue.Queue(maxsize)
+        self._stop = threading.Event()
+        self._error = None
+
+    def add_stage(self, name, func, workers=1, batch_size=None, batch_wait=0.0):
+        # The first stage's queue holds the pipeline input and is filled up front, so it is unbounded.
+        maxsize = self.maxsize if self._stages else 0
+        self._stages.append(Stage(name, func, workers, maxsize, batch_size, batch_wait))
+        return self
+
+    def run(self, items):
+        """Feed `items` to the first stage and yield the last stage's results as they arrive."""
+        threads = []
+        for index, stage in enumerate(self._stages):
+            stage.running = stage.workers
+            for n in range(stage.workers):
+                thread = threading.Thread(target=self._work, args=(index,), name=f"{stage.name}-{n}", daemon=True)
+                threads.append(thread)
+        first = self._stages[0]
+        for item in items:
+            first.queue.put(item)
+        for _ in range(first.workers):
+            first.queue.put(_DONE)
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                result = self._get(self._output)
+                if result is _DONE:
+                    break
+                yield result
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def _downstream(self, index):
+        if index + 1 < len(self._stages):
+            following = self._stages[index + 1]
+            return following.queue, following.workers
+        return self._output, 1
+
+    def _work(self, index):
+        stage = self._stages[index]
+        downstream, markers = self._downstream(index)
+        finished = False
+        try:
+            while not finished:
+                batch, finished = self._take(stage)
+                if not batch:
+                    continue
+                for result in stage.func(batch if stage.batch_size else batch[0]):
+                    if not self._put(downstream, result):
+                        return
+        except Exception as e:
+            self._error = e
+            self._stop.set()
+            return
+        with stage.lock:
+            stage.running -= 1
+            last = stage.running == 0
+        if last:
+            # One end marker per downstream worker, once every worker of this stage is done.
+            for _ in range(markers):
+                self._put(downstream, _DONE)
+
+    def _take(self, stage):
+        """Return `(items, finished)` for the next unit of work from the stage's queue."""
+        item = self._get(stage.queue)
+        if item is _DONE:
+            return [], True
+        batch = [item]
+        if stage.batch_size:
+            deadline = time.monotonic() + stage.batch_wait
+            while len(batch) < stage.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = stage.queue.get(timeout=remaining) if remaining > 0 else stage.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _DONE:
+                    return batch, True
+                batch.append(item)
+        return batch, False
+
+    def _get(self, q):
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _put(self, q, item):
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
@@ -0,0 +1,170 @@
+import argparse
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+
+from sentiment_analysis import NewsSentimentScanner, scan
+from sentiment_engines import registry
+
+# Config fields holding paths, which the daemon must resolve against the client's working directory.
+PATH_OPTIONS = ('file_path', 'cache_dir', 'model_cache_dir')
+
+
+class DaemonConnectionLost(ConnectionError):
+    """The daemon accepted a scan but the connection broke before it reported an exit status."""
+
+
+def default_socket_path():
+    return os.environ.get("SENTIMENT_DAEMON_SOCKET") or os.path.join(
+        tempfile.gettempdir(), f"market-sentiment-{os.getuid()}.sock")
+
+
+class _SocketStream:
+    """File-like object that relays writes to the client as `{"stdout"|"stderr": text}` lines."""
+
+    def __init__(self, wfile, name, lock):
+        self.wfile = wfile
+        self.name = name
+        self.lock = lock
+
+    def write(self, text):
+        if text:
+            send(self.wfile, {self.name: text}, self.lock)
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def send(wfile, message, lock):
+    with lock:
+        wfile.write((json.dumps(message) + "\n").encode())
+        wfile.flush()
+
+
+class ScanHandler(socketserver.StreamRequestHandler):
+    """Runs one scan per connection: reads the client's config line, streams back its output and exit status.
+
+    The client sends nothing after its config, so a read returning means it
+    disconnected; a `--watch` scan is then stopped after its current cycle
+    instead of running until its next write fails.
+    """
+
+    def handle(self):
+        lock = threading.Lock()
+        stderr = _SocketStream(self.wfile, 'stderr', lock)
+        scanner = None
+        error = None
+        try:
+            config = argparse.Namespace(**json.loads(self.rfile.readline())['config'])
+            scanner = NewsSentimentScanner(config, stdout=_SocketStream(self.wfile, 'stdout', lock), stderr=stderr)
+            threading.Thread(target=self._stop_on_disconnect, args=(scanner,), daemon=True).start()
+            scan(scanner, config)
+            status = 0
+        except (BrokenPipeError, ConnectionResetError):
+            # The client is gone: stop the scan and don't write to the dead socket.
+            if scanner is not None:
+                scanner.stop()
+            return
+        except Exception as e:
+            error = f"Error: {e}\n"
+            status = 1
+        try:
+            if error:
+                stderr.write(error)
+            send(self.wfile, {'exit': status}, lock)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _stop_on_disconnect(self, scanner):
+        try:
+            self.rfile.read(1)
+        except OSError:
+            pass
+        scanner.stop()
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def _socket_in_use(socket_path):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+        except OSError:
+            return False
+    return True
+
+
+def make_server(socket_path):
+    """Bind the daemon's socket, replacing a stale socket file left by a daemon that did not shut down cleanly."""
+    if os.path.exists(socket_path):
+        if _socket_in_use(socket_path):
+            raise RuntimeError(f"A daemon is already listening on {socket_path}")
+        os.unlink(socket_path)
+    old_umask = os.umask(0o177)
+    try:
+        return DaemonServer(socket_path, ScanHandler)
+    finally:
+        os.umask(old_umask)
+
+
+def serve(socket_path, analyzers=(), torch_threads=None, model_cache_dir=None):
+    """Run the warm scan daemon on `socket_path` until interrupted.
+
+    Analyzers are loaded before the socket opens, and the models, score
+    cache, HTTP sessions and extraction pools then stay loaded across scans.
+    Each connection runs one scan on its own thread. The socket is only
+    accessible to the user running the daemon.
+    """
+    # Pay for the imports the CLI defers until first use.
+    import feedparser  # noqa: F401
+    import newspaper  # noqa: F401
+    for name in analyzers:
+        registry.get(name, torch_threads=torch_threads, cache_dir=model_cache_dir)
+
+    server = make_server(socket_path)
+    # Let SIGTERM unwind through the finally below so the socket file is removed.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f"Sentiment daemon listening on {socket_path}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.unlink(socket_path)
+
+
+def run_remote(socket_path, config):
+    """Run a scan with `config` on the daemon at `socket_path`, relaying its output; return the exit status.
+
+    Raises OSError (e.g. FileNotFoundError, ConnectionRefusedError) if no daemon is listening, and
+    DaemonConnectionLost if the connection breaks once the scan was sent.
+    """
+    options = vars(config).copy()
+    for name in PATH_OPTIONS:
+        if options.get(name):
+            options[name] = os.path.abspath(options[name])
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        try:
+            sock.sendall((json.dumps({'config': options}) + "\n").encode())
+            with sock.makefile('r', encoding='utf-8') as replies:
+                for line in replies:
+                    message = json.loads(line)
+                    if 'exit' in message:
+                        return message['exit']
+                    stream = sys.stdout if 'stdout' in message else sys.stderr
+                    stream.write(message.get('stdout', message.get('stderr')))
+                    stream.flush()
+        except (OSError, ValueError) as e:
+            raise DaemonConnectionLost(f"Lost the connection to the daemon: {e}") from e
+    raise DaemonConnectionLost("The daemon closed the connection before the scan finished")
@@ -1,75 +1,196 @@
-import feedparser
-from newspaper import Article
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 from urllib.parse import quote
 import argparse
+import asyncio
 import json
+import os
 import sys
 import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import numpy as np
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
 
-# Defer import of torch until needed
+from article_dedup import DEFAULT_TITLE_SIMILARITY, ArticleDeduplicator, SeenArticles
+from caches import (
+    DEFAULT_CACHE_MAX_MB, DEFAULT_CACHE_TTL, DEFAULT_FEED_TTL, ContentCache, FeedCache, ScoreStore, score_cache, score_key,
+)
+from extraction import article_metadata, extract_article, get_extraction_pool, replace_broken_pool
+from http_session import (
+    DEFAULT_HTTP_TIMEOUT, DEFAULT_MAX_RESPONSE_MB, DEFAULT_MAX_RETRIES, DEFAULT_PER_HOST_LIMIT, DEFAULT_RATE_LIMIT,
+    AsyncHttpSession, get_session,
+)
+from metrics import CACHE_EVENTS, SCANS, StageTimer, profiled, timed
+from pipeline import DEFAULT_QUEUE_SIZE, Pipeline
+from series import DEFAULT_EWMA_ALPHA, SeriesStore
+from sentiment_engines import (
+    DEFAULT_CHUNK_STRIDE, DEFAULT_MAX_CHUNKS, FINBERT_BACKENDS, POOLING_MODES, MicroBatcher, check_chunk_stride,
+    get_vader_engine, registry,
+)
+
+GOOGLE_NEWS_RSS_URL = "https://news.google.com/rss/search"
+
+FEED_ENTRY_FIELDS = ('id', 'title', 'link', 'published', 'summary')
+
+def _entry_to_dict(entry):
+    """The JSON-serialisable part of a feedparser entry that the scanner uses."""
+    data = {key: entry[key] for key in FEED_ENTRY_FIELDS if key in entry}
+    if entry.get('source'):
+        data['source'] = dict(entry['source'])
+    return data
+
+def _entry_from_dict(data):
+    import feedparser
+
+    entry = feedparser.FeedParserDict(data)
+    if 'source' in data:
+        entry['source'] = feedparser.FeedParserDict(data['source'])
+    return entry
+
+class RunningSummary:
+    """Sentiment counts, mean and population standard deviation updated one article at a time.
+
+    Uses Welford's online algorithm, so streaming scans keep constant memory
+    however many articles they score.
+    """
+
+    def __init__(self):
+        self.counts = {"Positive": 0, "Negative": 0, "Neutral": 0}
+        self.total = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def update(self, polarity, sentiment):
+        self.counts[sentiment] += 1
+        self.total += 1
+        delta = polarity - self.mean
+        self.mean += delta / self.total
+        self._m2 += delta * (polarity - self.mean)
+
+    @property
+    def std_dev(self):
+        return (self._m2 / self.total) ** 0.5 if self.total else 0.0
+
+    def to_dict(self):
+        return {
+            'total_analyzed': self.total,
+            'positive': self.counts['Positive'],
+            'negative': self.counts['Negative'],
+            'neutral': self.counts['Neutral'],
+            'average_sentiment': float(self.mean),
+            'sentiment_std_dev': float(self.std_dev),
+        }
 
 class NewsSentimentScanner:
-    def __init__(self, config):
+    def __init__(self, config, http_session=None, stdout=None, stderr=None):
         self.config = config
+        self.http_session = http_session
+        # Where results and status messages go; None means the process's sys.stdout/sys.stderr at write time.
+        self.stdout = stdout
+        self.stderr = stderr
+        self.engine = None
         self.analyzer_func = self._get_analyzer()
+        self.content_cache = self._get_content_cache()
+        self.score_store = self._get_score_store()
+        self.feed_cache = self._get_feed_cache()
+        self.score_stats = {'hits': 0, 'misses': 0, 'coalesced': 0}
+        self.timer = StageTimer()
+        # Set by watch cycles: polarity of every article an earlier cycle scored, so it is
+        # not downloaded again, and per market the links already counted in its series.
+        self.scored_articles = None
+        self.seen_by_market = {}
+        self._known_articles = []
+        self._stop_watch = threading.Event()
 
     def _get_analyzer(self):
-        if self.config.analyzer == 'finbert':
-            from transformers import AutoTokenizer, AutoModelForSequenceClassification
-            import torch
-            self._log_status("Loading FinBERT model... (this may take a moment)")
-            model = AutoModelForSequenceClassification.from_pretrained("yiyanghkust/finbert-tone")
-            tokenizer = AutoTokenizer.from_pretrained("yiyanghkust/finbert-tone")
-            return lambda text: self._analyze_sentiment_finbert(text, model, tokenizer)
+        if self.config.analyzer in FINBERT_BACKENDS:
+            if not registry.is_loaded(self.config.analyzer):
+                self._log_status("Loading FinBERT model... (this may take a moment)")
+            self.engine = registry.get(
+                self.config.analyzer,
+                torch_threads=getattr(self.config, 'torch_threads', None),
+                cache_dir=getattr(self.config, 'model_cache_dir', None),
+            )
+            return self._analyze_sentiment_finbert
         else:
+            self.engine = get_vader_engine()
             return self._analyze_sentiment_vader
 
+    def _get_content_cache(self):
+        cache_dir = getattr(self.config, 'cache_dir', None)
+        if not cache_dir:
+            return None
+        return ContentCache(
+            os.path.join(cache_dir, 'articles.sqlite3'),
+            ttl=getattr(self.config, 'cache_ttl', DEFAULT_CACHE_TTL),
+            max_bytes=getattr(self.config, 'cache_max_mb', DEFAULT_CACHE_MAX_MB) * 1024 * 1024,
+        )
+
+    def _get_score_store(self):
+        cache_dir = getattr(self.config, 'cache_dir', None)
+        if not cache_dir:
+            return None
+        return ScoreStore(os.path.join(cache_dir, 'scores.sqlite3'))
+
+    def _get_feed_cache(self):
+        cache_dir = getattr(self.config, 'cache_dir', None)
+        if not cache_dir:
+            return None
+        return FeedCache(os.path.join(cache_dir, 'feeds.sqlite3'), ttl=getattr(self.config, 'feed_ttl', DEFAULT_FEED_TTL))
+
+    def _session_options(self):
+        return {
+            'timeout': getattr(self.config, 'timeout', DEFAULT_HTTP_TIMEOUT),
+            'per_host_limit': getattr(self.config, 'per_host_limit', DEFAULT_PER_HOST_LIMIT),
+            'rate_limit': getattr(self.config, 'rate_limit', DEFAULT_RATE_LIMIT),
+            'max_retries': getattr(self.config, 'max_retries', DEFAULT_MAX_RETRIES),
+            'max_bytes': int(getattr(self.config, 'max_response_mb', DEFAULT_MAX_RESPONSE_MB) * 1024 * 1024),
+        }
+
+    def _get_session(self):
+        return get_session(**self._session_options())
+
     def _log_status(self, message):
         if self.config.format == 'text' or self.config.file_path:
-            print(message, file=sys.stderr)
+            print(message, file=self.stderr or sys.stderr)
 
     def _analyze_sentiment_vader(self, text):
-        analyzer = SentimentIntensityAnalyzer()
-        scores = analyzer.polarity_scores(text)
-        polarity = scores['compound']
-        if polarity > 0.05:
-            sentiment = 'Positive'
-        elif polarity < -0.05:
-            sentiment = 'Negative'
-        else:
-            sentiment = 'Neutral'
-        return polarity, sentiment
+        return get_vader_engine().score(text)
 
-    def _analyze_sentiment_finbert(self, text, model, tokenizer):
-        import torch
-        if not text.strip():
-            return 0.0, 'Neutral'
-        
-        labels = ['Neutral', 'Positive', 'Negative']
-        inputs = tokenizer(text, return_tensors="pt", truncation=True, max_length=512, padding=True)
-        with torch.no_grad():
-            outputs = model(**inputs)
-        
-        logits = outputs.logits
-        probabilities = torch.softmax(logits, dim=1).numpy()[0]
-        max_index = np.argmax(probabilities)
-        sentiment = labels[max_index]
-        confidence = probabilities[max_index]
-        
-        if sentiment == 'Positive':
-            polarity = confidence
-        elif sentiment == 'Negative':
-            polarity = -confidence
-        else:
-            polarity = 0.0
+    def _analyze_sentiment_finbert(self, text):
+        return self.engine.score(text)
 
-        return float(polarity), sentiment
+    def _chunking_options(self):
+        pooling = getattr(self.config, 'pooling', None)
+        if self.config.analyzer not in FINBERT_BACKENDS or pooling in (None, 'none'):
+            return {}
+        return {
+            'pooling': pooling,
+            'max_chunks': getattr(self.config, 'max_chunks', DEFAULT_MAX_CHUNKS),
+            'chunk_stride': getattr(self.config, 'chunk_stride', DEFAULT_CHUNK_STRIDE),
+        }
 
-    def _fetch_news_items(self, query):
-        rss_url = f"https://news.google.com/rss/search?q={quote(query)}"
+    @timed('score')
+    def _analyze_batch(self, texts):
+        if self.engine is None:
+            return [self.analyzer_func(text) for text in texts]
+        batch_size = getattr(self.config, 'batch_size', 16)
+        chunking = self._chunking_options()
+        variant = f"|{chunking['pooling']}:{chunking['max_chunks']}:{chunking['chunk_stride']}" if chunking else ''
+        stats = {}
+        results = score_cache.get_or_compute(
+            [score_key(self.engine, text, variant) for text in texts],
+            texts,
+            lambda misses: self.engine.score_batch(misses, max_batch_size=batch_size, **chunking),
+            store=self.score_store,
+            stats=stats,
+        )
+        for result, count in stats.items():
+            self.score_stats[result] = self.score_stats.get(result, 0) + count
+            if count:
+                CACHE_EVENTS.inc(count, cache='scores', result=result)
+        return results
+
+    def _build_rss_url(self, query):
+        rss_url = f"{getattr(self.config, 'rss_base_url', GOOGLE_NEWS_RSS_URL)}?q={quote(query)}"
         if self.config.max_age:
             try:
                 match = re.match(r"(\d+)([hdwmy])", self.config.max_age.lower())
@@ -81,21 +202,198 @@ class NewsSentimentScanner:
                     self._log_status(f"Warning: Invalid max_age format '{self.config.max_age}'. Ignoring.")
             except Exception as e:
                 self._log_status(f"Warning: Could not parse max_age. Ignoring. Error: {e}")
+        return rss_url
+
+    @timed('feeds')
+    def _fetch_news_items(self, query):
+        import feedparser
+
+        rss_url = self._build_rss_url(query)
+        handlers = [self._get_session().urllib_handler()]
+        if self.feed_cache is None:
+            feed = feedparser.parse(rss_url, handlers=handlers)
+            return feed.entries[:self.config.num_articles]
+
+        cached = self.feed_cache.get(rss_url)
+        if self.feed_cache.is_fresh(cached):
+            self.feed_cache.record_hit()
+            CACHE_EVENTS.inc(cache='feeds', result='hit')
+            return [_entry_from_dict(entry) for entry in cached['entries'][:self.config.num_articles]]
+        feed = feedparser.parse(rss_url, etag=cached and cached['etag'], modified=cached and cached['modified'], handlers=handlers)
+        entries = self._update_feed_cache(rss_url, cached, feed.get('status'), feed.entries, feed.get('etag'), feed.get('modified'))
+        return entries[:self.config.num_articles]
+
+    def _update_feed_cache(self, rss_url, cached, status, entries, etag, modified):
+        """Store a fetched feed, or refresh the cached copy on 304; return the entries to use."""
+        if status == 304 and cached is not None:
+            self.feed_cache.touch(rss_url)
+            CACHE_EVENTS.inc(cache='feeds', result='revalidated')
+            return [_entry_from_dict(entry) for entry in cached['entries']]
+        if status is None or 200 <= status < 300:
+            self.feed_cache.put(rss_url, [_entry_to_dict(entry) for entry in entries], etag, modified)
+            CACHE_EVENTS.inc(cache='feeds', result='miss')
+        return entries
+
+    @timed('feeds')
+    async def _fetch_news_items_async(self, session, query):
+        import feedparser
+
+        rss_url = self._build_rss_url(query)
+        loop = asyncio.get_running_loop()
+        cached = None
+        headers = {}
+        if self.feed_cache is not None:
+            cached = await loop.run_in_executor(None, self.feed_cache.get, rss_url)
+            if self.feed_cache.is_fresh(cached):
+                self.feed_cache.record_hit()
+                CACHE_EVENTS.inc(cache='feeds', result='hit')
+                return query, [_entry_from_dict(entry) for entry in cached['entries'][:self.config.num_articles]]
+            if cached is not None and cached['etag']:
+                headers['If-None-Match'] = cached['etag']
+            if cached is not None and cached['modified']:
+                headers['If-Modified-Since'] = cached['modified']
+
+        response = await session.get(rss_url, headers=headers)
+        if response.status_code != 304:
+            response.raise_for_status()
+            feed = await loop.run_in_executor(None, feedparser.parse, response.content)
+            entries = feed.entries
+        else:
+            entries = []
+        if self.feed_cache is not None:
+            entries = await loop.run_in_executor(
+                None, self._update_feed_cache, rss_url, cached, response.status_code, entries,
+                response.headers.get('etag'), response.headers.get('last-modified'),
+            )
+        return query, entries[:self.config.num_articles]
+
+    def _get_cached_content(self, cache_key):
+        if self.content_cache is not None:
+            cached = self.content_cache.get(cache_key)
+            CACHE_EVENTS.inc(cache='content', result='miss' if cached is None else 'hit')
+            if cached is not None:
+                return cached[0]
+        return None
+
+    def _fetch_article_content(self, url, cache_key=None, parse=True):
+        """Return the article text, from the content cache when possible.
+
+        With `parse=False` a freshly downloaded page is returned as an unparsed
+        `Article` for `_parse_article`, so extraction can run in its own stage;
+        cache hits are still returned as text.
+        """
+        cache_key = cache_key or url
+        cached = self._get_cached_content(cache_key)
+        if cached is not None:
+            return cached
+        if parse:
+            return self._extract_article_content(url, cache_key)
+        try:
+            html = self._download_html(url)
+        except Exception as e:
+            return f"Content not retrieved due to an error: {e}"
+        from newspaper import Article
 
-        feed = feedparser.parse(rss_url)
-        return feed.entries[:self.config.num_articles]
+        article = Article(url)
+        article.download(input_html=html)
+        return article
+
+    @timed('download')
+    def _download_html(self, url):
+        response = self._get_session().get(url)
+        response.raise_for_status()
+        if not response.text:
+            raise ValueError("empty response body")
+        return response.text
+
+    def _extract_article_content(self, url, cache_key, html=None):
+        """Parse an article with newspaper, downloading it first unless `html` is given."""
+        from newspaper import Article
 
-    def _fetch_article_content(self, url):
         try:
+            if html is None:
+                html = self._download_html(url)
             article = Article(url)
-            article.download()
+            article.download(input_html=html)
+        except Exception as e:
+            return f"Content not retrieved due to an error: {e}"
+        return self._parse_article(article, url, cache_key)
+
+    @timed('extract')
+    def _parse_article(self, article, url, cache_key):
+        try:
             article.parse()
-            return article.text
         except Exception as e:
+            self.timer.error('extract')
             return f"Content not retrieved due to an error: {e}"
+        self._store_content(cache_key, article.text, article_metadata(url, article))
+        return article.text
 
-    def run(self, return_json=False):
-        market = self.config.market
+    def _store_content(self, cache_key, text, metadata):
+        if self.content_cache is not None and text:
+            self.content_cache.put(cache_key, text, metadata)
+
+    def _extraction_pool(self):
+        processes = getattr(self.config, 'extract_processes', 0)
+        return get_extraction_pool(processes) if processes else None
+
+    def _replace_extraction_pool(self, pool, error):
+        self._log_status(f"Extraction pool broke ({error}); starting a new one.")
+        return replace_broken_pool(self.config.extract_processes, pool)
+
+    @timed('extract')
+    def _extract_in_pool(self, pool, url, cache_key, html):
+        """Extract `html` in a worker process; the parent only handles the compact result and the cache write."""
+        try:
+            try:
+                text, metadata = pool.submit(extract_article, url, html).result()
+            except BrokenProcessPool as e:
+                pool = self._replace_extraction_pool(pool, e)
+                text, metadata = pool.submit(extract_article, url, html).result()
+        except Exception as e:
+            self.timer.error('extract')
+            return f"Content not retrieved due to an error: {e}"
+        self._store_content(cache_key, text, metadata)
+        return text
+
+    async def _fetch_article_content_async(self, session, url, cache_key):
+        loop = asyncio.get_running_loop()
+        cached = await loop.run_in_executor(None, self._get_cached_content, cache_key)
+        if cached is not None:
+            return cached
+        try:
+            html = await self._download_html_async(session, url)
+        except Exception as e:
+            return f"Content not retrieved due to an error: {e}"
+        pool = self._extraction_pool()
+        if pool is None:
+            return await loop.run_in_executor(None, self._extract_article_content, url, cache_key, html)
+        return await self._extract_in_pool_async(pool, url, cache_key, html)
+
+    @timed('download')
+    async def _download_html_async(self, session, url):
+        response = await session.get(url)
+        response.raise_for_status()
+        if not response.text:
+            raise ValueError("empty response body")
+        return response.text
+
+    @timed('extract')
+    async def _extract_in_pool_async(self, pool, url, cache_key, html):
+        try:
+            try:
+                text, metadata = await asyncio.wrap_future(pool.submit(extract_article, url, html))
+            except BrokenProcessPool as e:
+                pool = self._replace_extraction_pool(pool, e)
+                text, metadata = await asyncio.wrap_future(pool.submit(extract_article, url, html))
+        except Exception as e:
+            self.timer.error('extract')
+            return f"Content not retrieved due to an error: {e}"
+        await asyncio.get_running_loop().run_in_executor(None, self._store_content, cache_key, text, metadata)
+        return text
+
+    def _build_queries(self, market=None):
+        market = market or self.config.market
         
         neutral_queries = [
             f'{market} market news',
@@ -120,44 +418,411 @@ class NewsSentimentScanner:
             f'{market} pessimism OR bearish'
         ]
         
-        queries = neutral_queries + bullish_queries + bearish_queries
+        return neutral_queries + bullish_queries + bearish_queries
 
-        self._log_status(f"Fetching news for market: '{self.config.market}'...")
+    def _make_batcher(self):
+        return MicroBatcher(
+            self._analyze_batch,
+            max_batch_size=getattr(self.config, 'batch_size', 16),
+            max_wait=getattr(self.config, 'batch_wait_ms', 50) / 1000,
+        )
 
-        all_news_items = []
-        with ThreadPoolExecutor(max_workers=self.config.workers) as executor:
-            future_to_query = {executor.submit(self._fetch_news_items, query): query for query in queries}
-            for future in as_completed(future_to_query):
-                try:
-                    all_news_items.extend(future.result())
-                except Exception as e:
-                    self._log_status(f"Error fetching news for query '{future_to_query[future]}': {e}")
+    def _build_article(self, item, content):
+        """Return the output record for a downloaded article and the text to score for it."""
+        article_data = {
+            "title": item.title,
+            "link": item.link,
+            "canonical_link": item.canonical_link,
+            "published": item.published,
+            "matched_queries": item.queries,
+            "content": content,
+        }
+
+        text_to_analyze = item.title
+        if "Content not retrieved" not in content and content:
+            text_to_analyze += ' ' + content
+        return article_data, text_to_analyze
+
+    def _stage_workers(self, name, default):
+        return getattr(self.config, f'{name}_workers', None) or default
+
+    def _feed_stage(self, dedupe, query):
+        """Fetch one query's feed and return the articles no earlier feed contained."""
+        try:
+            items = self._fetch_news_items(query)
+        except Exception as e:
+            self._log_status(f"Error fetching news for query '{query}': {e}")
+            return []
+        return [article for article in (dedupe.add(query, item) for item in items) if article is not None and self._is_new(article)]
+
+    def _is_new(self, article):
+        """False for articles an earlier watch cycle already scored; those are remembered for the cycle's series."""
+        if self.scored_articles is None or article.canonical_link not in self.scored_articles:
+            return True
+        self._known_articles.append(article)
+        return False
+
+    def _download_stage(self, item):
+        return [(item, self._fetch_article_content(item.fetch_url, item.canonical_link, parse=False))]
+
+    def _extract_stage(self, downloaded):
+        item, content = downloaded
+        if not isinstance(content, str):
+            pool = self._extraction_pool()
+            if pool is not None and content.html:
+                content = self._extract_in_pool(pool, item.fetch_url, item.canonical_link, content.html)
+            else:
+                # Failed downloads have no HTML; parsing them in-process just reports the download error.
+                content = self._parse_article(content, item.fetch_url, item.canonical_link)
+        return [self._build_article(item, content)]
+
+    def _score_stage(self, batch):
+        try:
+            scores = self._analyze_batch([text_to_analyze for _, text_to_analyze in batch])
+        except Exception as e:
+            for article_data, _ in batch:
+                self._log_status(f"Error processing article '{article_data['title']}': {e}")
+            return []
+        for (article_data, _), (polarity, sentiment) in zip(batch, scores):
+            article_data['polarity'] = polarity
+            article_data['sentiment'] = sentiment
+        return [article_data for article_data, _ in batch]
+
+    def iter_articles(self, queries=None):
+        """Yield each scored article as soon as it has passed through the scan pipeline.
 
-        self._log_status(f"Found {len(all_news_items)} total articles. Fetching content...")
+        Feed fetches, article downloads, text extraction and scoring run as
+        separate stages with their own worker threads (`feed_workers`,
+        `download_workers`, `extract_workers`) and bounded queues of
+        `queue_size` between them, so downloads start as soon as the first feed
+        arrives and a slow stage holds back the ones before it. With
+        `extract_processes`, HTML parsing moves to a shared process pool.
+        Scoring runs on a single thread in batches of up to `batch_size`.
+        """
+        if queries is None:
+            queries = self._build_queries()
+            self._log_status(f"Fetching news for market: '{self.config.market}'...")
 
-        articles = []
-        with ThreadPoolExecutor(max_workers=self.config.workers) as executor:
-            future_to_item = {executor.submit(self._fetch_article_content, item.link): item for item in all_news_items}
-            for future in as_completed(future_to_item):
-                item = future_to_item[future]
+        self.timer.begin()
+        dedupe = ArticleDeduplicator(getattr(self.config, 'title_similarity', DEFAULT_TITLE_SIMILARITY))
+        workers = self.config.workers
+        pipeline = Pipeline(getattr(self.config, 'queue_size', DEFAULT_QUEUE_SIZE))
+        pipeline.add_stage('feeds', lambda query: self._feed_stage(dedupe, query), self._stage_workers('feed', workers))
+        pipeline.add_stage('download', self._download_stage, self._stage_workers('download', workers))
+        # With extract_processes, extract threads only hand pages to the process pool, so one per process keeps it busy.
+        extract_workers = getattr(self.config, 'extract_processes', 0) or min(workers, os.cpu_count() or 1)
+        pipeline.add_stage('extract', self._extract_stage, self._stage_workers('extract', extract_workers))
+        pipeline.add_stage(
+            'score', self._score_stage,
+            batch_size=getattr(self.config, 'batch_size', 16),
+            batch_wait=getattr(self.config, 'batch_wait_ms', 50) / 1000,
+        )
+        yield from pipeline.run(queries)
+        SCANS.inc()
+        self._log_status(f"Found {dedupe.total_seen} total articles ({len(dedupe.articles())} unique).")
+
+    def run(self, return_json=False):
+        if getattr(self.config, 'stream', False) and not return_json:
+            return self._stream_results(self.iter_events())
+        return self._output_results(list(self.iter_articles()), return_json=return_json)
+
+    def _make_async_session(self):
+        return AsyncHttpSession(max_connections=getattr(self.config, 'workers', 10), **self._session_options())
+
+    async def iter_articles_async(self, session=None, queries=None):
+        """Asyncio counterpart of `iter_articles` that never blocks the event loop.
+
+        Feeds and articles are fetched through one `AsyncHttpSession` (created
+        per scan unless one is passed here or to the constructor, e.g. the
+        API's shared session),
+        which applies the per-host limits, rate limits and retries. Article
+        downloads start as soon as their feed arrives; feed parsing, HTML
+        extraction and cache I/O run in the default executor and scoring on
+        the batcher thread.
+        """
+        if queries is None:
+            queries = self._build_queries()
+            self._log_status(f"Fetching news for market: '{self.config.market}'...")
+
+        self.timer.begin()
+        loop = asyncio.get_running_loop()
+        dedupe = ArticleDeduplicator(getattr(self.config, 'title_similarity', DEFAULT_TITLE_SIMILARITY))
+        batcher = self._make_batcher()
+        session = session or self.http_session
+        own_session = session is None
+        if own_session:
+            session = self._make_async_session()
+        finished = asyncio.Queue()
+
+        async def process(item):
+            try:
+                content = await self._fetch_article_content_async(session, item.fetch_url, item.canonical_link)
+                article_data, text_to_analyze = self._build_article(item, content)
+                polarity, sentiment = await asyncio.wrap_future(batcher.submit(text_to_analyze))
+                article_data['polarity'] = polarity
+                article_data['sentiment'] = sentiment
+                finished.put_nowait(article_data)
+            except Exception as e:
+                self._log_status(f"Error processing article '{item.title}': {e}")
+                finished.put_nowait(None)
+
+        feed_tasks = []
+        article_tasks = []
+        settled = 0
+        try:
+            feed_tasks = [asyncio.ensure_future(self._fetch_news_items_async(session, query)) for query in queries]
+            for feed_task in asyncio.as_completed(feed_tasks):
                 try:
-                    content = future.result()
-                    article_data = {"title": item.title, "link": item.link, "published": item.published, "content": content}
-                    
-                    text_to_analyze = item.title
-                    if "Content not retrieved" not in content and content:
-                        text_to_analyze += ' ' + content
-                    
-                    polarity, sentiment = self.analyzer_func(text_to_analyze)
-                    article_data['polarity'] = polarity
-                    article_data['sentiment'] = sentiment
-                    articles.append(article_data)
+                    query, items = await feed_task
                 except Exception as e:
-                    self._log_status(f"Error processing article '{item.title}': {e}")
-        
+                    self._log_status(f"Error fetching news: {e}")
+                    continue
+                for item in items:
+                    article = dedupe.add(query, item)
+                    if article is not None and self._is_new(article):
+                        article_tasks.append(asyncio.ensure_future(process(article)))
+                while not finished.empty():
+                    article_data = finished.get_nowait()
+                    settled += 1
+                    if article_data is not None:
+                        yield article_data
+            self._log_status(f"Found {dedupe.total_seen} total articles ({len(article_tasks)} unique). Fetching content...")
+            while settled < len(article_tasks):
+                article_data = await finished.get()
+                settled += 1
+                if article_data is not None:
+                    yield article_data
+            SCANS.inc()
+        finally:
+            # Also stop feeds still in flight, e.g. when a stream client disconnects,
+            # so nothing keeps using the session after it is closed.
+            pending = [task for task in feed_tasks + article_tasks if not task.done()]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            await loop.run_in_executor(None, batcher.close)
+            if own_session:
+                await session.aclose()
+
+    async def run_async(self, return_json=False, session=None):
+        articles = [article async for article in self.iter_articles_async(session)]
         return self._output_results(articles, return_json=return_json)
 
-    def _output_results(self, articles, return_json=False):
+    def _market_queries(self, markets):
+        """Map every query of every market to the markets that issue it."""
+        query_markets = {}
+        for market in markets:
+            for query in self._build_queries(market):
+                query_markets.setdefault(query, []).append(market)
+        self._log_status(f"Fetching news for {len(markets)} markets: {', '.join(markets)}...")
+        return query_markets
+
+    def _articles_by_market(self, markets, query_markets, articles):
+        by_market = {market: [] for market in markets}
+        for article in articles:
+            for market in dict.fromkeys(m for query in article['matched_queries'] for m in query_markets.get(query, ())):
+                by_market[market].append(article)
+        return by_market
+
+    def _market_results(self, markets, query_markets, articles, elapsed):
+        by_market = self._articles_by_market(markets, query_markets, articles)
+        return {
+            'markets': {
+                market: {'summary': self._summarize(market_articles), 'articles': market_articles}
+                for market, market_articles in by_market.items()
+            },
+            'timings': {
+                'total_seconds': round(elapsed, 3),
+                'seconds_per_market': round(elapsed / len(markets), 3) if markets else 0.0,
+                'unique_articles': len(articles),
+                'stages': self.timer.to_dict()['stages'],
+            },
+            'cache': self._cache_stats(),
+        }
+
+    def run_markets(self, markets, return_json=False):
+        """Scan several markets through one fetch pool, one deduplicated article set and one batcher.
+
+        An article matched by more than one market is downloaded and scored
+        once and counted in each of those markets' summaries.
+        """
+        markets = list(dict.fromkeys(markets))
+        start = time.perf_counter()
+        query_markets = self._market_queries(markets)
+        articles = list(self.iter_articles(list(query_markets)))
+        results = self._market_results(markets, query_markets, articles, time.perf_counter() - start)
+        return self._output_market_results(results, return_json=return_json)
+
+    async def run_markets_async(self, markets, return_json=False, session=None):
+        markets = list(dict.fromkeys(markets))
+        start = time.perf_counter()
+        query_markets = self._market_queries(markets)
+        articles = [article async for article in self.iter_articles_async(session, list(query_markets))]
+        results = self._market_results(markets, query_markets, articles, time.perf_counter() - start)
+        return self._output_market_results(results, return_json=return_json)
+
+    def _start_watch_cycle(self, markets):
+        if self.scored_articles is None:
+            self.scored_articles = SeenArticles()
+        for market in markets:
+            self.seen_by_market.setdefault(market, SeenArticles())
+        self._known_articles = []
+        self.timer = StageTimer()
+        return self._market_queries(markets)
+
+    def _record_watch_cycle(self, markets, query_markets, articles, store):
+        # Articles only count as seen once scored, so ones that failed are retried next cycle.
+        for article in articles:
+            self.scored_articles.add(article['canonical_link'], article['polarity'])
+        known = [
+            {'canonical_link': article.canonical_link, 'matched_queries': article.queries,
+             'polarity': self.scored_articles.get(article.canonical_link)}
+            for article in self._known_articles
+        ]
+        articles = articles + [article for article in known if article['polarity'] is not None]
+        timestamp = time.time()
+        points = {}
+        for market, market_articles in self._articles_by_market(markets, query_markets, articles).items():
+            seen = self.seen_by_market[market]
+            polarities = [article['polarity'] for article in market_articles if seen.add(article['canonical_link'])]
+            points[market] = store.record(market, timestamp, polarities)
+        return {'timestamp': timestamp, 'markets': points, 'timings': self.timer.to_dict()}
+
+    def watch_cycle(self, markets, store):
+        """Scan `markets` once, scoring only articles no earlier cycle saw, and add a point to each market's series.
+
+        Feeds are still fetched every cycle, but articles an earlier cycle
+        scored are dropped before download and reuse their polarity, so a
+        cycle costs in proportion to the new articles rather than to everything
+        still in the feeds. Each market counts an article once, in the first
+        cycle that finds it for that market.
+        """
+        query_markets = self._start_watch_cycle(markets)
+        articles = list(self.iter_articles(list(query_markets)))
+        return self._record_watch_cycle(markets, query_markets, articles, store)
+
+    async def watch_cycle_async(self, markets, store, session=None):
+        query_markets = self._start_watch_cycle(markets)
+        articles = [article async for article in self.iter_articles_async(session, list(query_markets))]
+        return self._record_watch_cycle(markets, query_markets, articles, store)
+
+    def watch(self, markets, interval, store=None, cycles=None):
+        """Run a watch cycle every `interval` seconds (at most `cycles` times, or until `stop`) and print each cycle's points."""
+        store = store or SeriesStore(alpha=getattr(self.config, 'ewma_alpha', DEFAULT_EWMA_ALPHA))
+        cycle = 0
+        while not self._stop_watch.is_set():
+            start = time.monotonic()
+            self._output_watch_cycle(self.watch_cycle(markets, store))
+            cycle += 1
+            if cycles is not None and cycle >= cycles:
+                break
+            self._stop_watch.wait(max(0.0, interval - (time.monotonic() - start)))
+        return store
+
+    def stop(self):
+        """Make a running `watch` return after its current cycle, e.g. when the daemon's client disconnects."""
+        self._stop_watch.set()
+
+    def _output_watch_cycle(self, cycle):
+        if self.config.format == 'json':
+            output = json.dumps(cycle)
+        else:
+            stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(cycle['timestamp']))
+            output = "\n".join(
+                f"{stamp} {market}: {point['new_articles']} new, EWMA {point['ewma']:+.4f} "
+                f"(std {point['ewm_std']:.4f}) over {point['total_articles']} articles"
+                for market, point in cycle['markets'].items()
+            )
+        if self.config.file_path:
+            with open(self.config.file_path, 'a') as f:
+                f.write(output + "\n")
+        else:
+            print(output, file=self.stdout or sys.stdout, flush=True)
+
+    def _cache_stats(self):
+        stats = {'scores': dict(self.score_stats)}
+        if self.content_cache is not None:
+            stats['content'] = self.content_cache.stats()
+        if self.feed_cache is not None:
+            stats['feeds'] = self.feed_cache.stats()
+        return stats
+
+    def _article_event(self, article, running):
+        running.update(article['polarity'], article['sentiment'])
+        return {'type': 'article', 'article': article, 'summary': running.to_dict()}
+
+    def _summary_event(self, running):
+        summary = dict(running.to_dict(), max_age_filter=self.config.max_age)
+        return {'type': 'summary', 'summary': summary, 'cache': self._cache_stats(), 'timings': self.timer.to_dict()}
+
+    def iter_events(self):
+        """Yield an 'article' event with the running summary per scored article, then a final 'summary' event."""
+        running = RunningSummary()
+        for article in self.iter_articles():
+            yield self._article_event(article, running)
+        yield self._summary_event(running)
+
+    async def iter_events_async(self, session=None):
+        running = RunningSummary()
+        async for article in self.iter_articles_async(session):
+            yield self._article_event(article, running)
+        yield self._summary_event(running)
+
+    def _format_article_lines(self, idx, article):
+        output_lines = []
+        output_lines.append(f"\nArticle {idx}: {article['title']}")
+        output_lines.append(f"Link: {article['link']}")
+        if 'sentiment' in article:
+            score_label = "Confidence" if self.config.analyzer in FINBERT_BACKENDS else "Polarity"
+            score = article['polarity']
+            output_lines.append(f"Sentiment: {article['sentiment']} ({score_label}: {score:.2f})")
+        else:
+            output_lines.append(f"Status: Could not be analyzed.")
+        return output_lines
+
+    def _format_summary_lines(self, summary):
+        output_lines = []
+        analyzed_articles_count = summary['total_analyzed']
+        output_lines.append(f"\n--- Market Sentiment Summary (using {self.config.analyzer}) ---")
+        if analyzed_articles_count == 0:
+            output_lines.append("No articles could be analyzed.")
+        else:
+            output_lines.append(f"Total articles successfully analyzed: {analyzed_articles_count}")
+            output_lines.append(f"Time Filter: {self.config.max_age}")
+            for sentiment in ("Positive", "Negative", "Neutral"):
+                count = summary[sentiment.lower()]
+                percent = (count / analyzed_articles_count) * 100 if analyzed_articles_count > 0 else 0
+                output_lines.append(f"{sentiment}: {count} ({percent:.2f}%)")
+            output_lines.append(f"\nAverage Sentiment (-1 to 1): {summary['average_sentiment']:.3f}")
+            output_lines.append(f"Sentiment Standard Deviation: {summary['sentiment_std_dev']:.3f}")
+        return output_lines
+
+    def _stream_results(self, events):
+        """Write each event as soon as it arrives: NDJSON lines for json, text blocks otherwise.
+
+        Only the running summary is kept, so memory does not grow with the number of articles.
+        """
+        output_target = self.config.file_path
+        out = open(output_target, 'w') if output_target else self.stdout or sys.stdout
+        try:
+            if self.config.format != 'json':
+                out.write("--- Analysis Results ---\n")
+            for event in events:
+                if self.config.format == 'json':
+                    out.write(json.dumps(event) + "\n")
+                elif event['type'] == 'article':
+                    out.write("\n".join(self._format_article_lines(event['summary']['total_analyzed'], event['article'])) + "\n")
+                else:
+                    out.write("\n".join(self._format_summary_lines(event['summary'])) + "\n")
+                out.flush()
+        finally:
+            if output_target:
+                out.close()
+                self._log_status(f"Output saved to {output_target}")
+
+    def _summarize(self, articles):
+        import numpy as np
+
         summary = {"Positive": 0, "Negative": 0, "Neutral": 0}
         polarity_scores = []
         for article in articles:
@@ -169,20 +834,52 @@ class NewsSentimentScanner:
         average_sentiment = np.mean(polarity_scores) if polarity_scores else 0.0
         sentiment_std_dev = np.std(polarity_scores) if polarity_scores else 0.0
 
+        return {
+            'total_analyzed': analyzed_articles_count,
+            'positive': summary['Positive'],
+            'negative': summary['Negative'],
+            'neutral': summary['Neutral'],
+            'average_sentiment': float(average_sentiment),
+            'sentiment_std_dev': float(sentiment_std_dev),
+            'max_age_filter': self.config.max_age
+        }
+
+    @timed('output')
+    def _output_market_results(self, results, return_json=False):
+        if return_json:
+            return results
+
+        output_target = self.config.file_path
+        if self.config.format == 'json':
+            output = json.dumps(results, indent=4)
+        else: # text format
+            output_lines = []
+            for market, market_results in results['markets'].items():
+                output_lines.append(f"=== {market} ===")
+                output_lines.extend(self._format_summary_lines(market_results['summary']))
+                output_lines.append("")
+            timings = results['timings']
+            output_lines.append(f"Scanned {len(results['markets'])} markets ({timings['unique_articles']} unique articles) "
+                                f"in {timings['total_seconds']:.2f}s")
+            output = "\n".join(output_lines)
+
+        if output_target:
+            with open(output_target, 'w') as f:
+                f.write(output)
+            self._log_status(f"Output saved to {output_target}")
+        else:
+            print(output, file=self.stdout or sys.stdout)
+
+    @timed('output')
+    def _output_results(self, articles, return_json=False):
         output_target = self.config.file_path
         
         results = {
-            'summary': {
-                'total_analyzed': analyzed_articles_count,
-                'positive': summary['Positive'],
-                'negative': summary['Negative'],
-                'neutral': summary['Neutral'],
-                'average_sentiment': float(average_sentiment),
-                'sentiment_std_dev': float(sentiment_std_dev),
-                'max_age_filter': self.config.max_age
-            },
+            'summary': self._summarize(articles),
             'articles': articles
         }
+        results['cache'] = self._cache_stats()
+        results['timings'] = self.timer.to_dict()
 
         if return_json:
             return results
@@ -193,38 +890,20 @@ class NewsSentimentScanner:
                     json.dump(results, f, indent=4)
                 self._log_status(f"Output saved to {output_target}")
             else:
-                print(json.dumps(results, indent=4))
+                print(json.dumps(results, indent=4), file=self.stdout or sys.stdout)
         else: # text format
             output_lines = []
             output_lines.append("--- Analysis Results ---")
             for idx, article in enumerate(articles, 1):
-                output_lines.append(f"\nArticle {idx}: {article['title']}")
-                output_lines.append(f"Link: {article['link']}")
-                if 'sentiment' in article:
-                    score_label = "Confidence" if self.config.analyzer == 'finbert' else "Polarity"
-                    score = article['polarity']
-                    output_lines.append(f"Sentiment: {article['sentiment']} ({score_label}: {score:.2f})")
-                else:
-                    output_lines.append(f"Status: Could not be analyzed.")
-
-            output_lines.append(f"\n--- Market Sentiment Summary (using {self.config.analyzer}) ---")
-            if analyzed_articles_count == 0:
-                output_lines.append("No articles could be analyzed.")
-            else:
-                output_lines.append(f"Total articles successfully analyzed: {analyzed_articles_count}")
-                output_lines.append(f"Time Filter: {self.config.max_age}")
-                for sentiment, count in summary.items():
-                    percent = (count / analyzed_articles_count) * 100 if analyzed_articles_count > 0 else 0
-                    output_lines.append(f"{sentiment}: {count} ({percent:.2f}%)")
-                output_lines.append(f"\nAverage Sentiment (-1 to 1): {average_sentiment:.3f}")
-                output_lines.append(f"Sentiment Standard Deviation: {sentiment_std_dev:.3f}")
+                output_lines.extend(self._format_article_lines(idx, article))
+            output_lines.extend(self._format_summary_lines(results['summary']))
             
             if output_target:
                 with open(output_target, 'w') as f:
                     f.write("\n".join(output_lines))
                 self._log_status(f"Output saved to {output_target}")
             else:
-                print("\n".join(output_lines))
+                print("\n".join(output_lines), file=self.stdout or sys.stdout)
 
 def main():
     parser = argparse.ArgumentParser(description="Analyze news sentiment for a given market.")
@@ -232,13 +911,110 @@ def main():
     parser.add_argument("-n", "--num_articles", type=int, default=10, help="Number of articles to fetch per query.")
     parser.add_argument("-w", "--workers", type=int, default=10, help="Number of concurrent workers.")
     parser.add_argument("-f", "--format", choices=['text', 'json'], default='text', help="Output format.")
-    parser.add_argument("-a", "--analyzer", choices=['vader', 'finbert'], default='vader', help="Sentiment analyzer to use.")
+    parser.add_argument("-a", "--analyzer", choices=('vader',) + FINBERT_BACKENDS, default='vader', help="Sentiment analyzer to use: finbert-int8 is an int8-quantized FinBERT, finbert-onnx runs FinBERT on ONNX Runtime.")
     parser.add_argument("-p", "--file_path", type=str, default=None, help="Path to save the output file.")
     parser.add_argument("-t", "--max_age", type=str, default='7d', help="Maximum age of articles (e.g., 1h, 5d, 2w, 1m, 1y).")
+    parser.add_argument("-s", "--stream", action="store_true", help="Print or write each article as soon as it is scored (NDJSON lines with --format json).")
+    parser.add_argument("--feed_workers", type=int, default=None, help="Threads fetching RSS feeds (defaults to --workers).")
+    parser.add_argument("--download_workers", type=int, default=None, help="Threads downloading article pages (defaults to --workers).")
+    parser.add_argument("--extract_workers", type=int, default=None, help="Threads extracting article text from downloaded pages (defaults to --workers, capped at the CPU count).")
+    parser.add_argument("--extract_processes", type=int, default=0, help="Parse downloaded HTML in a pool of this many worker processes instead of in threads (0 disables).")
+    parser.add_argument("--queue_size", type=int, default=DEFAULT_QUEUE_SIZE, help="Maximum items waiting between two pipeline stages.")
+    parser.add_argument("--per_host_limit", type=positive_int, default=DEFAULT_PER_HOST_LIMIT, help="Maximum concurrent requests per host.")
+    parser.add_argument("--rate_limit", type=float, default=DEFAULT_RATE_LIMIT, help="Maximum requests per second to any one host (0 disables).")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_HTTP_TIMEOUT, help="HTTP connect/read timeout in seconds.")
+    parser.add_argument("--max_retries", type=int, default=DEFAULT_MAX_RETRIES, help="Retries for connection errors, timeouts and 429/5xx responses, with jittered backoff.")
+    parser.add_argument("--max_response_mb", type=float, default=DEFAULT_MAX_RESPONSE_MB, help="Abandon feed or article responses larger than this many MB.")
+    parser.add_argument("--rss_base_url", type=str, default=GOOGLE_NEWS_RSS_URL, help="Google News RSS search endpoint (or a compatible mirror).")
+    parser.add_argument("--title_similarity", type=float, default=DEFAULT_TITLE_SIMILARITY, help="Word overlap (0-1) above which two headlines count as the same article; 1 disables near-duplicate matching.")
+    parser.add_argument("--cache_dir", type=str, default=None, help="Directory for the persistent article cache (disabled if not set).")
+    parser.add_argument("--cache_ttl", type=int, default=DEFAULT_CACHE_TTL, help="Seconds a cached article stays fresh.")
+    parser.add_argument("--cache_max_mb", type=int, default=DEFAULT_CACHE_MAX_MB, help="Maximum size of cached article text in MB; least recently used entries are evicted.")
+    parser.add_argument("--feed_ttl", type=int, default=DEFAULT_FEED_TTL, help="Seconds a cached RSS feed is served without contacting Google News; after that it is revalidated with ETag/Last-Modified (requires --cache_dir).")
+    parser.add_argument("--batch_size", type=int, default=16, help="Maximum number of articles scored in one batch.")
+    parser.add_argument("--batch_wait_ms", type=int, default=50, help="Maximum time (ms) to wait for a scoring batch to fill.")
+    parser.add_argument("--pooling", choices=('none',) + POOLING_MODES, default='none', help="FinBERT only: score long articles as overlapping 512-token chunks pooled this way, instead of truncating them.")
+    parser.add_argument("--max_chunks", type=positive_int, default=DEFAULT_MAX_CHUNKS, help="Maximum chunks scored per article when --pooling is set.")
+    parser.add_argument("--chunk_stride", type=parse_chunk_stride, default=DEFAULT_CHUNK_STRIDE, help="Tokens of overlap between consecutive chunks.")
+    parser.add_argument("--model_cache_dir", type=str, default=None, help="Where finbert-int8 and finbert-onnx cache their converted models (defaults to $SENTIMENT_MODEL_CACHE_DIR or ~/.cache/market-sentiment).")
+    parser.add_argument("--torch_threads", type=int, default=None, help="Number of threads torch uses for FinBERT inference.")
+    parser.add_argument("--markets", type=str, default=None, help="Comma-separated markets to scan together in one batch (e.g. gold,silver,AAPL); overrides --market.")
+    parser.add_argument("--profile", choices=['cprofile', 'pyinstrument'], default=None, help="Profile the scan with cProfile or pyinstrument.")
+    parser.add_argument("--profile_output", type=str, default=None, help="Where to write the profile (defaults to scan.prof for cProfile, scan.html for pyinstrument).")
+    parser.add_argument("--watch", type=parse_interval, default=None, metavar="INTERVAL", help="Re-scan every INTERVAL (e.g. 90, 30s, 5m, 1h), only scoring articles not seen in earlier cycles, and print each market's rolling sentiment.")
+    parser.add_argument("--ewma_alpha", type=float, default=DEFAULT_EWMA_ALPHA, help="Weight of each new article in the --watch EWMA polarity (0-1).")
+    parser.add_argument("--daemon", action="store_true", help="Run a long-lived daemon that keeps models, caches and pools warm and runs scans sent with --via_daemon.")
+    parser.add_argument("--via_daemon", action="store_true", help="Send the scan to a running daemon instead of scanning in this process (falls back to an in-process scan if none is running).")
+    parser.add_argument("--daemon_socket", type=str, default=None, help="Unix socket of the daemon (defaults to $SENTIMENT_DAEMON_SOCKET or <tmpdir>/market-sentiment-<uid>.sock).")
     args = parser.parse_args()
-    
+
+    if args.daemon:
+        from scan_daemon import default_socket_path, serve
+
+        preload = [n.strip() for n in os.environ.get("SENTIMENT_PRELOAD_ANALYZERS", "").split(",") if n.strip()]
+        serve(args.daemon_socket or default_socket_path(), dict.fromkeys([args.analyzer] + preload),
+              torch_threads=args.torch_threads, model_cache_dir=args.model_cache_dir)
+        return
+    if args.via_daemon and not args.profile:
+        from scan_daemon import DaemonConnectionLost, default_socket_path, run_remote
+
+        socket_path = args.daemon_socket or default_socket_path()
+        try:
+            sys.exit(run_remote(socket_path, args))
+        except DaemonConnectionLost as e:
+            # Part of the output may already be printed, so don't rerun the scan here.
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        except OSError:
+            print(f"No daemon listening on {socket_path}; scanning in-process.", file=sys.stderr)
+
     scanner = NewsSentimentScanner(args)
-    scanner.run()
+    if args.profile:
+        profile_output = args.profile_output or ('scan.html' if args.profile == 'pyinstrument' else 'scan.prof')
+        with profiled(args.profile, profile_output):
+            scan(scanner, args)
+        scanner._log_status(f"Profile saved to {profile_output}")
+    else:
+        scan(scanner, args)
+
+def parse_interval(value):
+    """Seconds in an interval like '90', '30s', '5m' or '1h'."""
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([smh]?)", value.strip().lower())
+    if not match or float(match.group(1)) <= 0:
+        raise argparse.ArgumentTypeError(f"invalid interval '{value}'; use e.g. 90, 30s, 5m or 1h")
+    return float(match.group(1)) * {'': 1, 's': 1, 'm': 60, 'h': 3600}[match.group(2)]
+
+def positive_int(value):
+    """argparse type for counts that must be at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got '{value}'")
+    return number
+
+def parse_chunk_stride(value):
+    """argparse type for --chunk_stride: an overlap that fits in a 512-token FinBERT chunk."""
+    try:
+        return check_chunk_stride(int(value))
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def _market_list(markets):
+    return [market.strip() for market in markets.split(",") if market.strip()]
+
+def scan(scanner, args):
+    markets = getattr(args, 'markets', None)
+    if getattr(args, 'watch', None):
+        try:
+            scanner.watch(_market_list(markets) if markets else [args.market], args.watch)
+        except KeyboardInterrupt:
+            pass
+    elif markets:
+        scanner.run_markets(_market_list(markets))
+    else:
+        scanner.run()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
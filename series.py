@@ -0,0 +1,115 @@
+import bisect
+import math
+import threading
+from array import array
+
+DEFAULT_EWMA_ALPHA = 0.1
+DEFAULT_MAX_POINTS = 10000
+SERIES_FIELDS = ('timestamp', 'new_articles', 'cycle_mean', 'ewma', 'ewm_std', 'total_articles')
+COUNT_FIELDS = ('new_articles', 'total_articles')
+
+
+class EwmaStats:
+    """Exponentially weighted mean and standard deviation of polarity, updated one article at a time.
+
+    Each new article gets weight `alpha` and older ones decay geometrically,
+    so the mean tracks drift in sentiment while the state stays two floats.
+    """
+
+    def __init__(self, alpha=DEFAULT_EWMA_ALPHA):
+        self.alpha = alpha
+        self.count = 0
+        self.mean = 0.0
+        self.var = 0.0
+
+    def update(self, polarity):
+        self.count += 1
+        if self.count == 1:
+            self.mean = polarity
+            return
+        diff = polarity - self.mean
+        increment = self.alpha * diff
+        self.mean += increment
+        self.var = (1 - self.alpha) * (self.var + diff * increment)
+
+    @property
+    def std_dev(self):
+        return math.sqrt(self.var)
+
+
+def _json_value(field, value):
+    if math.isnan(value):
+        return None
+    return int(value) if field in COUNT_FIELDS else value
+
+
+class SentimentSeries:
+    """One market's sentiment history, one point per watch cycle.
+
+    Points are stored column by column in typed arrays (8 bytes per value)
+    and capped at `max_points`, dropping the oldest. Each point holds the
+    cycle's new-article count and mean polarity plus the EWMA, its standard
+    deviation and the running article count after the cycle.
+    """
+
+    def __init__(self, alpha=DEFAULT_EWMA_ALPHA, max_points=DEFAULT_MAX_POINTS):
+        self.stats = EwmaStats(alpha)
+        self.max_points = max_points
+        self.columns = {field: array('d') for field in SERIES_FIELDS}
+
+    def __len__(self):
+        return len(self.columns['timestamp'])
+
+    def record(self, timestamp, polarities):
+        """Fold one cycle's new polarities into the EWMA and append the cycle's point; return the point."""
+        for polarity in polarities:
+            self.stats.update(polarity)
+        point = {
+            'timestamp': timestamp,
+            'new_articles': len(polarities),
+            'cycle_mean': sum(polarities) / len(polarities) if polarities else math.nan,
+            'ewma': self.stats.mean,
+            'ewm_std': self.stats.std_dev,
+            'total_articles': self.stats.count,
+        }
+        for field, value in point.items():
+            self.columns[field].append(value)
+        excess = len(self) - self.max_points
+        if excess > 0:
+            for column in self.columns.values():
+                del column[:excess]
+        return {field: _json_value(field, float(value)) for field, value in point.items()}
+
+    def to_dict(self, since=None, limit=None):
+        """Columns of the points after Unix time `since`, at most the last `limit` of them."""
+        start = bisect.bisect_right(self.columns['timestamp'], since) if since is not None else 0
+        if limit is not None:
+            start = max(start, len(self) - limit)
+        return {field: [_json_value(field, value) for value in column[start:]] for field, column in self.columns.items()}
+
+
+class SeriesStore:
+    """Thread-safe `SentimentSeries` per market, created on the first point recorded for it."""
+
+    def __init__(self, alpha=DEFAULT_EWMA_ALPHA, max_points=DEFAULT_MAX_POINTS):
+        self.alpha = alpha
+        self.max_points = max_points
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def record(self, market, timestamp, polarities):
+        with self._lock:
+            series = self._series.get(market)
+            if series is None:
+                series = self._series[market] = SentimentSeries(self.alpha, self.max_points)
+            return series.record(timestamp, polarities)
+
+    def get(self, market, since=None, limit=None):
+        """The market's series as columns, or None if nothing was recorded for it."""
+        with self._lock:
+            series = self._series.get(market)
+            return series.to_dict(since, limit) if series is not None else None
+
+    def markets(self):
+        with self._lock:
+            return list(self._series)
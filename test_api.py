@@ -1,12 +1,16 @@
 import pytest
+import asyncio
 import json
-from unittest.mock import patch, MagicMock
+import time
+from unittest.mock import AsyncMock, patch, MagicMock
 import argparse
 import numpy as np
 from fastapi.testclient import TestClient
 
-from api import app
+from api import _watch_markets, app
 from sentiment_analysis import NewsSentimentScanner
+from sentiment_engines import registry
+from series import SeriesStore
 
 # Fixture for the test client
 @pytest.fixture(scope="module")
@@ -14,10 +18,10 @@ def client():
     with TestClient(app=app) as client:
         yield client
 
-# Mock for NewsSentimentScanner.run to avoid actual network calls
+# Mock for NewsSentimentScanner.run_async to avoid actual network calls
 @pytest.fixture
 def mock_scanner_run():
-    with patch.object(NewsSentimentScanner, 'run') as mock_run:
+    with patch.object(NewsSentimentScanner, 'run_async', new_callable=AsyncMock) as mock_run:
         # Configure mock to return a predictable JSON structure
         mock_run.return_value = {
             "summary": {
@@ -53,7 +57,72 @@ def test_health_endpoint(client):
     """Test the /health endpoint."""
     response = client.get("/health")
     assert response.status_code == 200
-    assert response.json() == {"status": "ok"}
+    data = response.json()
+    assert data["status"] == "ok"
+    assert isinstance(data["models"], dict)
+    assert data["process"]["rss_bytes"] > 0
+
+def test_health_reports_preloaded_models(monkeypatch):
+    """Test that analyzers listed in SENTIMENT_PRELOAD_ANALYZERS are loaded at startup and reported."""
+    monkeypatch.setenv("SENTIMENT_PRELOAD_ANALYZERS", "vader")
+    registry.clear()
+    with TestClient(app=app) as preload_client:
+        assert registry.is_loaded("vader")
+        models = preload_client.get("/health").json()["models"]
+    assert models["vader"]["load_seconds"] >= 0
+    assert "rss_delta_bytes" in models["vader"]
+
+def test_http_session_settings_from_environment(monkeypatch):
+    """Test that the shared session's per-host limit, connection pool and timeout come from the environment."""
+    monkeypatch.setenv("SENTIMENT_PER_HOST_LIMIT", "12")
+    monkeypatch.setenv("SENTIMENT_MAX_CONNECTIONS", "64")
+    monkeypatch.setenv("SENTIMENT_HTTP_TIMEOUT", "2.5")
+    with TestClient(app=app):
+        session = app.state.http_session
+        assert (session.per_host_limit, session.max_connections, session.timeout) == (12, 64, 2.5)
+
+def test_invalid_per_host_limit_fails_at_startup(monkeypatch):
+    """Test that a per-host limit below 1 stops the app from starting instead of hanging scans."""
+    monkeypatch.setenv("SENTIMENT_PER_HOST_LIMIT", "0")
+    with pytest.raises(ValueError, match="SENTIMENT_PER_HOST_LIMIT"):
+        with TestClient(app=app):
+            pass
+
+def test_metrics_endpoint(client):
+    """Test that /metrics exposes the stage histograms and counters in the Prometheus text format."""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith("text/plain")
+    assert "# TYPE sentiment_stage_seconds histogram" in response.text
+    assert "# TYPE sentiment_cache_events_total counter" in response.text
+
+def test_series_endpoint(client):
+    """Test that /series returns recorded points as columns, filtered by market, time and count."""
+    store = SeriesStore()
+    for timestamp, polarities in ((100.0, [0.5, 0.1]), (200.0, []), (300.0, [-0.4])):
+        store.record("gold", timestamp, polarities)
+    store.record("silver", 100.0, [0.2])
+    with patch.object(app.state, "series", store):
+        everything = client.get("/series").json()
+        gold = client.get("/series", params={"market": "gold", "since": 100, "limit": 1}).json()
+        missing = client.get("/series", params={"market": "copper"})
+    assert set(everything["markets"]) == {"gold", "silver"}
+    assert everything["markets"]["gold"]["new_articles"] == [2, 0, 1]
+    assert everything["markets"]["gold"]["cycle_mean"][1] is None
+    assert gold["markets"]["gold"]["timestamp"] == [300.0]
+    assert gold["markets"]["gold"]["total_articles"] == [3]
+    assert missing.status_code == 404
+
+def test_watch_job_runs_cycles_until_cancelled(mock_get_analyzer):
+    """Test that the background watch job runs a cycle per interval over all watched markets."""
+    store = SeriesStore()
+    with patch.object(NewsSentimentScanner, 'watch_cycle_async', new_callable=AsyncMock) as mock_cycle, \
+         patch('api.asyncio.sleep', new_callable=AsyncMock, side_effect=[None, asyncio.CancelledError]) as mock_sleep:
+        with pytest.raises(asyncio.CancelledError):
+            asyncio.run(_watch_markets(["gold", "silver"], 60, store))
+    assert mock_cycle.call_count == 2
+    mock_cycle.assert_called_with(["gold", "silver"], store)
+    assert 0 <= mock_sleep.call_args.args[0] <= 60
 
 def test_root_endpoint_webform(client):
     """Test the root endpoint serves the webform."""
@@ -91,6 +160,12 @@ def test_scan_endpoint_validation_error(client):
     assert "detail" in data
     assert "num_articles" in data["detail"][0]["loc"]
 
+def test_scan_endpoint_rejects_chunk_stride_longer_than_chunk(client):
+    """Test that a chunk stride the tokenizer cannot use is a validation error."""
+    response = client.post("/scan", json={"market": "TestMarket", "analyzer": "finbert", "pooling": "mean", "chunk_stride": 510})
+    assert response.status_code == 422
+    assert "chunk_stride" in response.json()["detail"][0]["loc"]
+
 def test_scan_endpoint_finbert_analyzer(client, mock_scanner_run, mock_get_analyzer):
     """Test the /scan endpoint with finbert analyzer specified."""
     payload = {
@@ -105,5 +180,77 @@ def test_scan_endpoint_finbert_analyzer(client, mock_scanner_run, mock_get_analy
     assert data["summary"]["max_age_filter"] == "7d" # Default from NewsSentimentScanner config
     mock_scanner_run.assert_called_once_with(return_json=True)
 
+def test_background_scan_job(client, mock_scanner_run, mock_get_analyzer):
+    """Test that a background /scan returns a job id to poll and identical requests share that job."""
+    payload = {"market": "JobMarket", "num_articles": 1, "analyzer": "vader", "max_age": "1d"}
+    submitted = client.post("/scan?background=true", json=payload)
+    again = client.post("/scan?background=true", json={**payload, "workers": 3})
+    assert submitted.status_code == 202
+    job_id = submitted.json()["job_id"]
+    assert submitted.json()["url"] == f"/jobs/{job_id}"
+    assert again.json()["job_id"] == job_id
+    assert again.json()["reused"] is True
+
+    for _ in range(100):
+        job = client.get(f"/jobs/{job_id}").json()
+        if job["status"] in ("done", "failed"):
+            break
+        time.sleep(0.01)
+    assert job["status"] == "done"
+    assert job["result"]["summary"]["total_analyzed"] == 1
+    mock_scanner_run.assert_called_once_with(return_json=True)
+
+def test_unknown_job(client):
+    """Test that polling an unknown job id is a 404."""
+    assert client.get("/jobs/does-not-exist").status_code == 404
+
+@pytest.fixture
+def mock_scanner_events():
+    async def fake_events(self, client=None):
+        yield {"type": "article", "article": {"title": "Test Article", "polarity": 0.5, "sentiment": "Positive"},
+               "summary": {"total_analyzed": 1}}
+        yield {"type": "summary", "summary": {"total_analyzed": 1, "max_age_filter": "1d"}, "cache": {}}
+    with patch.object(NewsSentimentScanner, 'iter_events_async', fake_events):
+        yield
+
+def test_scan_stream_ndjson(client, mock_scanner_events, mock_get_analyzer):
+    """Test that /scan/stream emits one NDJSON line per event."""
+    response = client.post("/scan/stream", json={"market": "TestMarket", "num_articles": 1})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert [event["type"] for event in events] == ["article", "summary"]
+    assert events[0]["article"]["title"] == "Test Article"
+
+def test_scan_stream_sse(client, mock_scanner_events, mock_get_analyzer):
+    """Test that /scan/stream?format=sse emits Server-Sent Events."""
+    response = client.post("/scan/stream?format=sse", json={"market": "TestMarket", "num_articles": 1})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    blocks = [block for block in response.text.split("\n\n") if block]
+    assert blocks[0].startswith("event: article\ndata: ")
+    assert json.loads(blocks[1].split("data: ", 1)[1])["type"] == "summary"
+
+def test_scan_stream_rejects_unknown_format(client):
+    """Test that an unsupported stream format is a validation error."""
+    response = client.post("/scan/stream?format=xml", json={"market": "TestMarket"})
+    assert response.status_code == 422
+
+def test_scan_batch_endpoint(client, mock_get_analyzer):
+    """Test that /scan/batch scans all requested markets through a single scanner."""
+    batch_results = {"markets": {"gold": {"summary": {}, "articles": []}, "silver": {"summary": {}, "articles": []}},
+                     "timings": {"total_seconds": 1.0}, "cache": {}}
+    with patch.object(NewsSentimentScanner, 'run_markets_async', new_callable=AsyncMock) as mock_run_markets:
+        mock_run_markets.return_value = batch_results
+        response = client.post("/scan/batch", json={"markets": ["gold", "silver"], "num_articles": 1})
+    assert response.status_code == 200
+    assert set(response.json()["markets"]) == {"gold", "silver"}
+    mock_run_markets.assert_called_once_with(["gold", "silver"], return_json=True)
+
+def test_scan_batch_requires_markets(client):
+    """Test that /scan/batch rejects an empty market list."""
+    response = client.post("/scan/batch", json={"markets": []})
+    assert response.status_code == 422
+
 if __name__ == '__main__':
     pytest.main()
@@ -0,0 +1,111 @@
+import unittest
+import base64
+from unittest.mock import MagicMock
+
+from article_dedup import ArticleDeduplicator, SeenArticles, canonicalize_url, normalize_title, unwrap_redirect
+
+def make_item(title, link):
+    item = MagicMock(title=title, link=link, published="Mon, 01 Jan 2024 00:00:00 GMT")
+    item.source = {'title': 'Reuters'}
+    return item
+
+def legacy_google_news_link(url):
+    payload = b'\x08\x13"' + bytes([len(url)]) + url.encode() + b'\xd2\x01\x00'
+    article_id = base64.urlsafe_b64encode(payload).decode().rstrip('=')
+    return f"https://news.google.com/rss/articles/{article_id}?oc=5"
+
+class TestCanonicalizeUrl(unittest.TestCase):
+
+    def test_strips_tracking_parameters_and_normalises(self):
+        """Test that tracking parameters, www., fragments and trailing slashes are removed."""
+        self.assertEqual(
+            canonicalize_url("HTTP://WWW.Example.com/markets/gold/?utm_source=rss&id=7&fbclid=abc#comments"),
+            "https://example.com/markets/gold?id=7",
+        )
+
+    def test_sorts_query_parameters(self):
+        """Test that parameter order does not change the canonical URL."""
+        self.assertEqual(canonicalize_url("https://example.com/a?b=2&a=1"), canonicalize_url("https://example.com/a?a=1&b=2"))
+
+    def test_malformed_links_fall_back_to_raw_link(self):
+        """Test that a bad port or IPv6 host does not raise and the link is kept as given."""
+        self.assertEqual(canonicalize_url(" http://example.com:abc/gold "), "http://example.com:abc/gold")
+        self.assertEqual(canonicalize_url("http://[example/gold"), "http://[example/gold")
+        dedupe = ArticleDeduplicator()
+        self.assertIsNotNone(dedupe.add("gold market news", make_item("Gold rallies - Reuters", "http://example.com:abc/gold")))
+
+    def test_unwraps_legacy_google_news_link(self):
+        """Test that a decodable Google News article id is unwrapped to the publisher URL."""
+        link = legacy_google_news_link("https://www.example.com/gold-rally.html?utm_medium=feed")
+        self.assertEqual(unwrap_redirect(link), "https://www.example.com/gold-rally.html?utm_medium=feed")
+        self.assertEqual(canonicalize_url(link), "https://example.com/gold-rally.html")
+
+    def test_unwraps_google_url_redirect(self):
+        """Test that news.google.com/url?url=... redirects are unwrapped."""
+        self.assertEqual(unwrap_redirect("https://news.google.com/url?url=https://example.com/x&ct=ga"), "https://example.com/x")
+
+    def test_opaque_google_news_link_is_kept(self):
+        """Test that an opaque Google News id is kept, minus tracking parameters."""
+        self.assertEqual(
+            canonicalize_url("https://news.google.com/rss/articles/AU_yqLxyz?oc=5"),
+            "https://news.google.com/rss/articles/AU_yqLxyz",
+        )
+
+class TestArticleDeduplicator(unittest.TestCase):
+
+    def test_same_link_from_several_queries(self):
+        """Test that one article matched by several queries is kept once with every query recorded."""
+        dedupe = ArticleDeduplicator()
+        first = dedupe.add("gold price surge OR rally", make_item("Gold rallies - Reuters", "https://example.com/a?utm_source=x"))
+        second = dedupe.add("gold optimism OR bullish", make_item("Gold rallies - Reuters", "https://www.example.com/a"))
+        self.assertIsNotNone(first)
+        self.assertIsNone(second)
+        self.assertEqual(first.queries, ["gold price surge OR rally", "gold optimism OR bullish"])
+        self.assertEqual(dedupe.total_seen, 2)
+        self.assertEqual(dedupe.duplicates_removed, 1)
+
+    def test_near_duplicate_titles(self):
+        """Test that syndicated copies with near-identical headlines are merged."""
+        dedupe = ArticleDeduplicator(title_threshold=0.8)
+        dedupe.add("q1", make_item("Gold hits record high as Fed signals rate cuts - Reuters", "https://a.com/1"))
+        dedupe.add("q2", make_item("Gold hits a record high as Fed signals rate cuts - Yahoo Finance", "https://b.com/2"))
+        dedupe.add("q3", make_item("Silver slumps on strong dollar - Reuters", "https://c.com/3"))
+        self.assertEqual([len(article.queries) for article in dedupe.articles()], [2, 1])
+
+    def test_threshold_of_one_only_merges_identical_titles(self):
+        """Test that a threshold of 1 disables fuzzy title matching."""
+        dedupe = ArticleDeduplicator(title_threshold=1)
+        dedupe.add("q1", make_item("Gold hits record high as Fed signals rate cuts", "https://a.com/1"))
+        dedupe.add("q2", make_item("Gold hits a record high as Fed signals rate cuts", "https://b.com/2"))
+        self.assertEqual(len(dedupe.articles()), 2)
+
+    def test_normalize_title_drops_publisher_suffix(self):
+        """Test that the publisher suffix and punctuation are removed from headlines."""
+        self.assertEqual(normalize_title("Gold's rally: what next? - Kitco NEWS", "Kitco NEWS"), "gold s rally what next")
+
+class TestSeenArticles(unittest.TestCase):
+
+    def test_forgets_least_recently_seen(self):
+        """Test that repeats are reported as seen and the least recently seen link is evicted first."""
+        seen = SeenArticles(max_entries=2)
+        self.assertTrue(seen.add("a"))
+        self.assertTrue(seen.add("b"))
+        self.assertFalse(seen.add("a"))
+        self.assertTrue(seen.add("c"))
+        self.assertEqual(len(seen), 2)
+        self.assertNotIn("b", seen)
+        self.assertFalse(seen.add("a"))
+        self.assertTrue(seen.add("b"))
+
+    def test_values_are_kept_and_refreshed(self):
+        """Test that a link's value is returned by get, which also counts as a use for eviction."""
+        seen = SeenArticles(max_entries=2)
+        seen.add("a", 0.5)
+        seen.add("b", -0.2)
+        self.assertEqual(seen.get("a"), 0.5)
+        seen.add("c", 0.1)
+        self.assertIsNone(seen.get("b"))
+        self.assertEqual(seen.get("a"), 0.5)
+
+if __name__ == '__main__':
+    unittest.main()
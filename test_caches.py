@@ -0,0 +1,190 @@
+import unittest
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import closing
+from unittest.mock import MagicMock, patch
+
+from caches import ContentCache, FeedCache, ScoreCache, ScoreStore, score_key
+
+def write_entries(path, prefix, count):
+    cache = ContentCache(path)
+    for i in range(count):
+        cache.put(f"{prefix}/{i}", "text " * 10)
+    return count
+
+class TestContentCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "articles.sqlite3")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_round_trip_and_counters(self):
+        """Test that stored text and metadata are returned and hits/misses are counted."""
+        cache = ContentCache(self.path)
+        self.assertIsNone(cache.get("https://example.com/a"))
+        cache.put("https://example.com/a", "Gold rallied.", {"title": "Gold"})
+        self.assertEqual(cache.get("https://example.com/a"), ("Gold rallied.", {"title": "Gold"}))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_entries_expire_after_ttl(self):
+        """Test that entries older than the TTL are treated as misses."""
+        cache = ContentCache(self.path, ttl=60)
+        cache.put("https://example.com/a", "old text")
+        with patch('caches.time.time', return_value=time.time() + 61):
+            self.assertIsNone(cache.get("https://example.com/a"))
+
+    def test_evicts_least_recently_used(self):
+        """Test that the least recently read entries are evicted once the size limit is exceeded."""
+        cache = ContentCache(self.path, max_bytes=25)
+        cache.put("a", "x" * 10)
+        time.sleep(0.01)
+        cache.put("b", "x" * 10)
+        time.sleep(0.01)
+        cache.get("a")
+        time.sleep(0.01)
+        cache.put("c", "x" * 10)
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+
+    def test_byte_total_tracks_inserts_replacements_and_evictions(self):
+        """Test that the running byte total matches the stored text after overwrites and batch evictions."""
+        cache = ContentCache(self.path, max_bytes=1000)
+        for n in range(30):
+            cache.put(f"u{n}", "x" * 50)
+        cache.put("u29", "y" * 20)
+        with closing(sqlite3.connect(self.path)) as conn:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM articles").fetchone()[0]
+        self.assertEqual(cache.stats()['bytes'], total)
+        self.assertLessEqual(total, 1000)
+        self.assertIsNotNone(cache.get("u29"))
+        self.assertIsNone(cache.get("u0"))
+
+    def test_shared_by_threads_and_processes(self):
+        """Test that concurrent writers in several threads and processes do not lose entries."""
+        ContentCache(self.path)
+        with ThreadPoolExecutor(max_workers=4) as threads:
+            list(threads.map(lambda n: write_entries(self.path, f"thread{n}", 20), range(4)))
+        with ProcessPoolExecutor(max_workers=2) as processes:
+            list(processes.map(write_entries, [self.path] * 2, ["proc0", "proc1"], [20, 20]))
+        self.assertEqual(ContentCache(self.path).stats()['entries'], 120)
+
+class TestFeedCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "feeds.sqlite3")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_round_trip_with_validators(self):
+        """Test that entries and their ETag/Last-Modified validators are returned for a stored feed."""
+        cache = FeedCache(self.path)
+        self.assertIsNone(cache.get("https://news.example/rss?q=gold"))
+        cache.put("https://news.example/rss?q=gold", [{"title": "Gold"}], etag='"abc"', modified="Mon, 01 Jan 2024 00:00:00 GMT")
+        record = cache.get("https://news.example/rss?q=gold")
+        self.assertEqual(record['entries'], [{"title": "Gold"}])
+        self.assertEqual((record['etag'], record['modified']), ('"abc"', "Mon, 01 Jan 2024 00:00:00 GMT"))
+        self.assertTrue(cache.is_fresh(record))
+
+    def test_touch_renews_stale_entry(self):
+        """Test that a feed past its TTL is stale until a 304 response touches it."""
+        cache = FeedCache(self.path, ttl=60)
+        cache.put("feed", [], etag='"abc"')
+        later = time.time() + 61
+        with patch('caches.time.time', return_value=later):
+            self.assertFalse(cache.is_fresh(cache.get("feed")))
+            cache.touch("feed")
+            self.assertTrue(cache.is_fresh(cache.get("feed")))
+        self.assertEqual(cache.stats(), {'hits': 0, 'revalidated': 1, 'misses': 1})
+
+class CountingScorer:
+    """Fake score_batch that records every text it is asked to score."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.scored = []
+        self.lock = threading.Lock()
+
+    def __call__(self, texts):
+        time.sleep(self.delay)
+        with self.lock:
+            self.scored.extend(texts)
+        return [(float(len(text)), 'Neutral') for text in texts]
+
+class TestScoreCache(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = MagicMock(revision='rev1')
+        self.engine.name = 'finbert'
+
+    def keys(self, texts):
+        return [score_key(self.engine, text) for text in texts]
+
+    def test_key_depends_on_analyzer_revision_and_text(self):
+        """Test that the key changes with the analyzer, its revision and the text."""
+        other_revision = MagicMock(revision='rev2')
+        other_revision.name = 'finbert'
+        self.assertEqual(score_key(self.engine, "a"), score_key(self.engine, "a"))
+        self.assertNotEqual(score_key(self.engine, "a"), score_key(self.engine, "b"))
+        self.assertNotEqual(score_key(self.engine, "a"), score_key(other_revision, "a"))
+
+    def test_repeated_texts_are_scored_once(self):
+        """Test that duplicates within a call and across calls are only scored once."""
+        cache, scorer, stats = ScoreCache(), CountingScorer(), {}
+        texts = ["gold up", "gold down", "gold up"]
+        first = cache.get_or_compute(self.keys(texts), texts, scorer, stats=stats)
+        second = cache.get_or_compute(self.keys(texts), texts, scorer, stats=stats)
+        self.assertEqual(first, second)
+        self.assertEqual(sorted(scorer.scored), ["gold down", "gold up"])
+        self.assertEqual(stats, {'hits': 3, 'misses': 2, 'coalesced': 1})
+
+    def test_concurrent_callers_share_one_computation(self):
+        """Test that threads asking for the same in-flight text wait instead of rescoring it."""
+        cache, scorer = ScoreCache(), CountingScorer(delay=0.05)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: cache.get_or_compute(self.keys(["same"]), ["same"], scorer), range(8)))
+        self.assertEqual(scorer.scored, ["same"])
+        self.assertTrue(all(result == [(4.0, 'Neutral')] for result in results))
+
+    def test_lru_is_bounded(self):
+        """Test that the in-memory tier evicts the least recently used entries."""
+        cache, scorer = ScoreCache(max_entries=2), CountingScorer()
+        for text in ["a", "b", "a", "c"]:
+            cache.get_or_compute(self.keys([text]), [text], scorer)
+        self.assertEqual(len(cache), 2)
+        cache.get_or_compute(self.keys(["b"]), ["b"], scorer)
+        self.assertEqual(scorer.scored, ["a", "b", "c", "b"])
+
+    def test_disk_tier_survives_process_restart(self):
+        """Test that a fresh in-memory cache is filled from the on-disk tier without rescoring."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = ScoreStore(os.path.join(tmpdir, "scores.sqlite3"))
+            ScoreCache().get_or_compute(self.keys(["gold"]), ["gold"], CountingScorer(), store=store)
+            scorer, stats = CountingScorer(), {}
+            result = ScoreCache().get_or_compute(self.keys(["gold"]), ["gold"], scorer, store=store, stats=stats)
+        self.assertEqual(result, [(4.0, 'Neutral')])
+        self.assertEqual(scorer.scored, [])
+        self.assertEqual(stats['hits'], 1)
+
+    def test_errors_are_not_cached(self):
+        """Test that a failed computation is raised and retried on the next call."""
+        cache = ScoreCache()
+        def failing(texts):
+            raise RuntimeError("model failure")
+        with self.assertRaises(RuntimeError):
+            cache.get_or_compute(self.keys(["gold"]), ["gold"], failing)
+        scorer = CountingScorer()
+        cache.get_or_compute(self.keys(["gold"]), ["gold"], scorer)
+        self.assertEqual(scorer.scored, ["gold"])
+
+if __name__ == '__main__':
+    unittest.main()
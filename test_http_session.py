@@ -0,0 +1,131 @@
+import unittest
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import feedparser
+import httpx
+
+from http_session import AsyncHttpSession, HttpSession, ResponseTooLarge, TokenBucket, backoff_delay
+
+RSS = b'<?xml version="1.0"?><rss version="2.0"><channel><item><title>Gold</title><link>https://example.com/a</link></item></channel></rss>'
+
+def mock_session(handler, **options):
+    session = HttpSession(**options)
+    session.client = httpx.Client(transport=httpx.MockTransport(handler))
+    return session
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_burst_then_paced(self):
+        """Test that a full bucket allows a burst and then asks callers to wait 1/rate per request."""
+        bucket = TokenBucket(rate=10, burst=2)
+        self.assertEqual([bucket.reserve(), bucket.reserve()], [0.0, 0.0])
+        self.assertAlmostEqual(bucket.reserve(), 0.1, delta=0.01)
+        self.assertAlmostEqual(bucket.reserve(), 0.2, delta=0.01)
+
+    def test_backoff_is_jittered_and_capped(self):
+        """Test that backoff delays stay within the exponential window and honour Retry-After."""
+        for attempt in range(6):
+            self.assertLessEqual(backoff_delay(attempt, cap=2.0), min(2.0, 0.5 * 2 ** attempt))
+        response = httpx.Response(429, headers={'Retry-After': '3'})
+        self.assertEqual(backoff_delay(0, response), 3.0)
+
+class TestHttpSession(unittest.TestCase):
+
+    def test_retries_transient_errors(self):
+        """Test that 503 responses and connection errors are retried until a success."""
+        replies = iter([httpx.ConnectError("refused"), httpx.Response(503), httpx.Response(200, text="ok")])
+
+        def handler(request):
+            reply = next(replies)
+            if isinstance(reply, Exception):
+                raise reply
+            return reply
+
+        session = mock_session(handler, max_retries=2)
+        with patch('http_session.time.sleep'):
+            response = session.get("https://example.com/a")
+        self.assertEqual((response.status_code, response.text), (200, "ok"))
+
+    def test_gives_up_after_max_retries(self):
+        """Test that the last retryable response is returned once retries are exhausted."""
+        session = mock_session(lambda request: httpx.Response(503), max_retries=1)
+        with patch('http_session.time.sleep'):
+            self.assertEqual(session.get("https://example.com/a").status_code, 503)
+
+    def test_rejects_oversized_responses(self):
+        """Test that bodies above max_bytes raise ResponseTooLarge, with or without Content-Length."""
+        session = mock_session(lambda request: httpx.Response(200, content=b"x" * 2048), max_bytes=1024)
+        with self.assertRaises(ResponseTooLarge):
+            session.get("https://example.com/big")
+
+        def chunked(request):
+            return httpx.Response(200, stream=httpx.ByteStream(b"x" * 2048), headers={'Transfer-Encoding': 'chunked'})
+
+        with self.assertRaises(ResponseTooLarge):
+            mock_session(chunked, max_bytes=1024).get("https://example.com/big")
+
+    def test_per_host_limit(self):
+        """Test that concurrent requests to one host never exceed per_host_limit."""
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def handler(request):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+            return httpx.Response(200, text="ok")
+
+        session = mock_session(handler, per_host_limit=2)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(session.get, ["https://example.com/%d" % i for i in range(16)]))
+        self.assertEqual(peak[0], 2)
+
+    def test_rejects_per_host_limit_below_one(self):
+        """Test that a per-host limit of zero is an error instead of a session whose requests never start."""
+        for session_cls in (HttpSession, AsyncHttpSession):
+            with self.assertRaises(ValueError):
+                session_cls(per_host_limit=0)
+
+    def test_feedparser_requests_go_through_session(self):
+        """Test that feedparser fetches through the session's urllib handler, including conditional 304s."""
+        seen = []
+
+        def handler(request):
+            seen.append(request.headers.get('if-none-match'))
+            if request.headers.get('if-none-match') == '"v1"':
+                return httpx.Response(304, headers={'ETag': '"v1"'})
+            return httpx.Response(200, content=RSS, headers={'ETag': '"v1"', 'Content-Type': 'application/rss+xml'})
+
+        session = mock_session(handler)
+        feed = feedparser.parse("https://news.example/rss?q=gold", handlers=[session.urllib_handler()])
+        self.assertEqual((feed.status, len(feed.entries), feed.etag), (200, 1, '"v1"'))
+        feed = feedparser.parse("https://news.example/rss?q=gold", etag='"v1"', handlers=[session.urllib_handler()])
+        self.assertEqual(feed.status, 304)
+        self.assertEqual(seen, [None, '"v1"'])
+
+class TestAsyncHttpSession(unittest.TestCase):
+
+    def test_retries_and_shares_client(self):
+        """Test that the async session retries 429s over a caller-supplied client and leaves it open."""
+        replies = iter([httpx.Response(429, headers={'Retry-After': '0'}), httpx.Response(200, text="ok")])
+
+        async def scenario():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: next(replies)))
+            session = AsyncHttpSession(client)
+            response = await session.get("https://example.com/a")
+            await session.aclose()
+            self.assertFalse(client.is_closed)
+            await client.aclose()
+            return response
+
+        self.assertEqual(asyncio.run(scenario()).text, "ok")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+import unittest
+import asyncio
+import time
+from unittest.mock import patch
+
+from jobs import JobQueueFull, ScanJobQueue
+
+class TestScanJobQueue(unittest.TestCase):
+
+    def test_identical_in_flight_jobs_are_coalesced(self):
+        """Test that submitting a key whose job is still running returns that job and scans once."""
+        calls = []
+
+        async def run():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {'summary': {}}
+
+        async def main():
+            queue = ScanJobQueue()
+            first, first_reused = queue.submit('gold', run)
+            second, second_reused = queue.submit('gold', run)
+            other, _ = queue.submit('silver', run)
+            await asyncio.gather(first.task, other.task)
+            return first, first_reused, second, second_reused, other
+
+        first, first_reused, second, second_reused, other = asyncio.run(main())
+        self.assertIs(second, first)
+        self.assertEqual((first_reused, second_reused), (False, True))
+        self.assertIsNot(other, first)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(first.to_dict()['result'], {'summary': {}})
+
+    def test_results_are_reused_within_ttl(self):
+        """Test that a finished job is returned until its result TTL expires, then the scan runs again."""
+        async def run():
+            return {'summary': {}}
+
+        async def main():
+            queue = ScanJobQueue(result_ttl=60)
+            first, _ = queue.submit('gold', run)
+            await first.task
+            cached, reused = queue.submit('gold', run)
+            with patch('jobs.time.time', return_value=time.time() + 61):
+                fresh, fresh_reused = queue.submit('gold', run)
+                await fresh.task
+            return first, cached, reused, fresh, fresh_reused, queue
+
+        first, cached, reused, fresh, fresh_reused, queue = asyncio.run(main())
+        self.assertIs(cached, first)
+        self.assertTrue(reused)
+        self.assertIsNot(fresh, first)
+        self.assertFalse(fresh_reused)
+        self.assertIs(queue.get(first.id), first)
+
+    def test_failed_jobs_are_not_reused(self):
+        """Test that a failed job reports its error and the next identical request retries the scan."""
+        async def fail():
+            raise RuntimeError("feed unavailable")
+
+        async def main():
+            queue = ScanJobQueue()
+            failed, _ = queue.submit('gold', fail)
+            await failed.task
+            retry, reused = queue.submit('gold', fail)
+            await retry.task
+            return failed, retry, reused
+
+        failed, retry, reused = asyncio.run(main())
+        self.assertEqual(failed.to_dict()['status'], 'failed')
+        self.assertEqual(failed.error, "feed unavailable")
+        self.assertIsNot(retry, failed)
+        self.assertFalse(reused)
+
+    def test_concurrency_is_bounded(self):
+        """Test that no more than `workers` jobs run at once and the rest wait queued."""
+        running = []
+        peak = []
+
+        async def run():
+            running.append(1)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.pop()
+            return {}
+
+        async def main():
+            queue = ScanJobQueue(workers=2)
+            jobs = [queue.submit(market, run)[0] for market in ('gold', 'silver', 'copper', 'oil')]
+            await asyncio.sleep(0)
+            statuses = queue.stats()
+            await asyncio.gather(*(job.task for job in jobs))
+            return statuses, queue.stats()
+
+        statuses, finished = asyncio.run(main())
+        self.assertEqual(max(peak), 2)
+        self.assertEqual((statuses['running'], statuses['queued']), (2, 2))
+        self.assertEqual(finished['done'], 4)
+
+    def test_finished_jobs_expire_after_retention(self):
+        """Test that finished jobs are forgotten once their retention has passed."""
+        async def run():
+            return {}
+
+        async def main():
+            queue = ScanJobQueue(result_ttl=10, retention=30)
+            job, _ = queue.submit('gold', run)
+            await job.task
+            with patch('jobs.time.time', return_value=time.time() + 31):
+                return job, queue.get(job.id)
+
+        job, expired = asyncio.run(main())
+        self.assertIsNone(expired)
+        self.assertEqual(job.status, 'done')
+
+    def test_results_are_dropped_after_ttl(self):
+        """Test that a finished job keeps only its status once its result is older than the TTL."""
+        async def run():
+            return {'articles': ['long text']}
+
+        async def main():
+            queue = ScanJobQueue(result_ttl=10, retention=30)
+            job, _ = queue.submit('gold', run)
+            await job.task
+            with patch('jobs.time.time', return_value=time.time() + 11):
+                return queue.get(job.id)
+
+        job = asyncio.run(main())
+        self.assertIsNone(job.result)
+        self.assertEqual(job.to_dict(), {**job.to_dict(include_result=False), 'result_expired': True})
+        self.assertEqual(job.to_dict()['status'], 'done')
+
+    def test_number_of_jobs_is_capped(self):
+        """Test that the oldest finished jobs are forgotten beyond max_jobs and submit fails when all are running."""
+        async def run():
+            return {}
+
+        async def block():
+            await asyncio.sleep(60)
+
+        async def main():
+            queue = ScanJobQueue(max_jobs=2)
+            first, _ = queue.submit('gold', run)
+            second, _ = queue.submit('silver', run)
+            await asyncio.gather(first.task, second.task)
+            third, _ = queue.submit('copper', block)
+            fourth, _ = queue.submit('oil', block)
+            kept = (queue.get(first.id), queue.get(second.id), queue.get(third.id))
+            with self.assertRaises(JobQueueFull):
+                queue.submit('zinc', block)
+            await queue.aclose()
+            return kept
+
+        first, second, third = asyncio.run(main())
+        self.assertIsNone(first)
+        self.assertIsNone(second)
+        self.assertIsNotNone(third)
+
+if __name__ == '__main__':
+    unittest.main()
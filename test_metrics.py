@@ -0,0 +1,69 @@
+import unittest
+import asyncio
+
+from metrics import Counter, Histogram, MetricsRegistry, StageTimer, timed
+
+class TestMetricsRegistry(unittest.TestCase):
+
+    def test_render_counter_and_histogram(self):
+        """Test that counters and histograms render in the Prometheus text format with cumulative buckets."""
+        registry = MetricsRegistry()
+        counter = registry.register(Counter('events_total', 'Events.', labels=('kind',)))
+        histogram = registry.register(Histogram('latency_seconds', 'Latency.', labels=('stage',), buckets=(0.1, 1.0)))
+        counter.inc(kind='hit')
+        counter.inc(2, kind='hit')
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, stage='feeds')
+
+        lines = registry.render().splitlines()
+        self.assertIn('# TYPE events_total counter', lines)
+        self.assertIn('events_total{kind="hit"} 3', lines)
+        self.assertIn('latency_seconds_bucket{stage="feeds",le="0.1"} 2', lines)
+        self.assertIn('latency_seconds_bucket{stage="feeds",le="1.0"} 3', lines)
+        self.assertIn('latency_seconds_bucket{stage="feeds",le="+Inf"} 4', lines)
+        self.assertIn('latency_seconds_count{stage="feeds"} 4', lines)
+
+class TestStageTimer(unittest.TestCase):
+
+    def test_stage_durations_and_errors(self):
+        """Test that timed blocks are summarised per stage and that raising or marked blocks count as errors."""
+        timer = StageTimer()
+        timer.begin()
+        for _ in range(3):
+            with timer.stage('download'):
+                pass
+        with self.assertRaises(ValueError):
+            with timer.stage('download'):
+                raise ValueError("boom")
+        timer.error('extract')
+
+        timings = timer.to_dict()
+        self.assertGreaterEqual(timings['total_seconds'], 0)
+        download = timings['stages']['download']
+        self.assertEqual((download['count'], download['errors']), (4, 1))
+        self.assertLessEqual(download['p50_ms'], download['max_ms'])
+        self.assertNotIn('extract', timings['stages'])
+
+    def test_timed_decorator_sync_and_async(self):
+        """Test that @timed records calls of plain methods and coroutines under their stage."""
+        class Worker:
+            def __init__(self):
+                self.timer = StageTimer()
+
+            @timed('score')
+            def score(self, value):
+                return value * 2
+
+            @timed('feeds')
+            async def fetch(self, value):
+                await asyncio.sleep(0)
+                return value
+
+        worker = Worker()
+        self.assertEqual(worker.score(2), 4)
+        self.assertEqual(asyncio.run(worker.fetch(3)), 3)
+        stages = worker.timer.to_dict()['stages']
+        self.assertEqual((stages['score']['count'], stages['feeds']['count']), (1, 1))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+import threading
+import time
+
+from pipeline import Pipeline
+
+class TestPipeline(unittest.TestCase):
+
+    def test_items_flow_through_every_stage(self):
+        """Test that each stage's results reach the next stage and every result is yielded once."""
+        pipeline = Pipeline(maxsize=4)
+        pipeline.add_stage('split', lambda n: [n] * n, workers=3)
+        pipeline.add_stage('square', lambda n: [n * n], workers=2)
+        self.assertEqual(sorted(pipeline.run([1, 2, 3])), [1, 4, 4, 9, 9, 9])
+
+    def test_bounded_queues_apply_backpressure(self):
+        """Test that a slow consumer stops the first stage from running far ahead of it."""
+        produced = []
+        pipeline = Pipeline(maxsize=2)
+        pipeline.add_stage('produce', lambda n: produced.append(n) or [n], workers=1)
+        pipeline.add_stage('forward', lambda n: [n], workers=1)
+        results = pipeline.run(range(100))
+        next(results)
+        time.sleep(0.3)
+        # Two bounded queues, one item held by each worker and one consumed.
+        self.assertLessEqual(len(produced), 2 + 2 + 2 + 1)
+        self.assertEqual(len(list(results)), 99)
+
+    def test_batch_stage_receives_lists(self):
+        """Test that a batching stage gets items in lists of at most batch_size."""
+        sizes = []
+        pipeline = Pipeline()
+        pipeline.add_stage('source', lambda n: [n], workers=1)
+        pipeline.add_stage('batch', lambda items: sizes.append(len(items)) or items, batch_size=4, batch_wait=0.2)
+        self.assertEqual(sorted(pipeline.run(range(10))), list(range(10)))
+        self.assertEqual(sum(sizes), 10)
+        self.assertLessEqual(max(sizes), 4)
+
+    def test_stage_error_is_raised_to_consumer(self):
+        """Test that an exception in a stage stops the pipeline and is re-raised by run()."""
+        def fail_on_three(n):
+            if n == 3:
+                raise ValueError("bad item")
+            return [n]
+
+        pipeline = Pipeline()
+        pipeline.add_stage('check', fail_on_three, workers=2)
+        with self.assertRaises(ValueError):
+            list(pipeline.run(range(10)))
+
+    def test_closing_early_stops_workers(self):
+        """Test that abandoning the result iterator stops and joins every worker thread."""
+        pipeline = Pipeline(maxsize=1)
+        pipeline.add_stage('source', lambda n: [n], workers=2)
+        results = pipeline.run(range(1000))
+        next(results)
+        results.close()
+        self.assertFalse([t for t in threading.enumerate() if t.name.startswith('source-')])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import unittest
+import argparse
+import io
+import json
+import os
+import socket
+import stat
+import tempfile
+import threading
+from unittest.mock import patch
+
+from benchmarks.stub_news_server import StubNewsServer
+import scan_daemon
+import sentiment_analysis
+from scan_daemon import DaemonConnectionLost, make_server, run_remote
+
+class TestScanDaemon(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.tmpdir.name, "daemon.sock")
+        self.server = make_server(self.socket_path)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmpdir.cleanup()
+
+    def test_remote_scan_relays_output(self):
+        """Test that a scan sent to the daemon prints the same JSON result a local scan would."""
+        self.assertEqual(stat.S_IMODE(os.stat(self.socket_path).st_mode), 0o600)
+        with StubNewsServer(items_per_feed=2, article_pool=10, paragraphs=3) as stub:
+            config = argparse.Namespace(market='gold', num_articles=2, workers=4, format='json', analyzer='vader',
+                                        file_path=None, max_age='7d', rss_base_url=stub.rss_base_url)
+            with patch('sys.stdout', new_callable=io.StringIO) as stdout:
+                status = run_remote(self.socket_path, config)
+
+        self.assertEqual(status, 0)
+        results = json.loads(stdout.getvalue())
+        self.assertEqual(results['summary']['total_analyzed'], len(results['articles']))
+        self.assertEqual(stub.requests['article'], len(results['articles']))
+
+    def test_failed_scan_reports_error_and_status(self):
+        """Test that an exception in the daemon's scan reaches the client as stderr text and exit status 1."""
+        config = argparse.Namespace(market='gold', format='json', analyzer='vader', file_path=None, max_age='7d')
+        with patch('scan_daemon.scan', side_effect=RuntimeError("boom")), \
+             patch('sys.stderr', new_callable=io.StringIO) as stderr:
+            status = run_remote(self.socket_path, config)
+        self.assertEqual(status, 1)
+        self.assertIn("boom", stderr.getvalue())
+
+    def test_client_disconnect_stops_watch(self):
+        """Test that a --watch scan on the daemon ends as soon as its client disconnects, not at its next write."""
+        finished = threading.Event()
+        real_scan = scan_daemon.scan
+
+        def scan_and_signal(scanner, config):
+            try:
+                real_scan(scanner, config)
+            finally:
+                finished.set()
+
+        cycle = {'timestamp': 0.0, 'markets': {}, 'timings': {}}
+        config = {'market': 'gold', 'format': 'json', 'analyzer': 'vader', 'file_path': None, 'max_age': '7d', 'watch': 60}
+        with patch('scan_daemon.scan', side_effect=scan_and_signal), \
+             patch.object(sentiment_analysis.NewsSentimentScanner, 'watch_cycle', return_value=cycle) as mock_cycle:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                client.connect(self.socket_path)
+                client.sendall((json.dumps({'config': config}) + "\n").encode())
+                with client.makefile('r') as replies:
+                    self.assertIn('stdout', json.loads(replies.readline()))
+            self.assertTrue(finished.wait(10))
+        self.assertEqual(mock_cycle.call_count, 1)
+
+    def test_refuses_second_daemon_on_same_socket(self):
+        """Test that binding a socket another daemon is listening on fails instead of stealing it."""
+        with self.assertRaises(RuntimeError):
+            make_server(self.socket_path)
+
+class TestRemoteConnectionLoss(unittest.TestCase):
+
+    def test_dropped_connection_raises(self):
+        """Test that a daemon closing the connection mid-scan raises DaemonConnectionLost after relaying its output."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            socket_path = os.path.join(tmpdir, "daemon.sock")
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+                server.bind(socket_path)
+                server.listen(1)
+
+                def accept_and_drop():
+                    conn, _ = server.accept()
+                    with conn:
+                        conn.makefile('rb').readline()
+                        conn.sendall(b'{"stdout": "partial"}\n')
+
+                thread = threading.Thread(target=accept_and_drop)
+                thread.start()
+                config = argparse.Namespace(market='gold', file_path=None)
+                with patch('sys.stdout', new_callable=io.StringIO) as stdout, \
+                     self.assertRaises(DaemonConnectionLost):
+                    run_remote(socket_path, config)
+                thread.join()
+        self.assertEqual(stdout.getvalue(), "partial")
+
+    def test_cli_exits_with_message_when_connection_is_lost(self):
+        """Test that --via_daemon reports a lost connection in one line and exits 1 instead of rescanning."""
+        argv = ['sentiment_analysis.py', '--via_daemon', '-m', 'gold']
+        with patch('sys.argv', argv), \
+             patch('scan_daemon.run_remote', side_effect=DaemonConnectionLost("Lost the connection to the daemon")), \
+             patch('sentiment_analysis.NewsSentimentScanner') as mock_scanner, \
+             patch('sys.stderr', new_callable=io.StringIO) as stderr, \
+             self.assertRaises(SystemExit) as exit_info:
+            sentiment_analysis.main()
+        self.assertEqual(exit_info.exception.code, 1)
+        self.assertEqual(stderr.getvalue(), "Error: Lost the connection to the daemon\n")
+        mock_scanner.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,25 @@
 import unittest
 import argparse
+import asyncio
+import importlib.util
+import io
 import json
+import os
+import signal
+import tempfile
+import time
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch, MagicMock
 
-from sentiment_analysis import NewsSentimentScanner
+from benchmarks.stub_news_server import StubNewsServer
+from extraction import get_extraction_pool
+from sentiment_analysis import NewsSentimentScanner, RunningSummary, parse_chunk_stride, parse_interval, positive_int
+from series import SeriesStore
+from sentiment_engines import (
+    FinbertEngine, MicroBatcher, ModelRegistry, OnnxFinbertEngine, QuantizedFinbertEngine, check_chunk_stride,
+    get_vader_engine, pool_probabilities, select_chunks,
+)
 
 class TestSentimentAnalysis(unittest.TestCase):
 
@@ -64,6 +79,33 @@ class TestSentimentAnalysis(unittest.TestCase):
         polarity, sentiment = self.finbert_scanner.analyzer_func("The stock is traded on the NASDAQ stock exchange.")
         self.assertEqual(sentiment, 'Neutral')
 
+    def test_finbert_batch_matches_single(self):
+        """Test that padded batch inference gives the same labels and scores as one-at-a-time inference."""
+        texts = [
+            "Earnings per share have increased significantly year over year.",
+            "",
+            "The company announced a major loss and widespread layoffs.",
+            "The stock is traded on the NASDAQ stock exchange.",
+        ]
+        batch_results = self.finbert_scanner.engine.score_batch(texts)
+        for text, (polarity, sentiment) in zip(texts, batch_results):
+            single_polarity, single_sentiment = self.finbert_scanner.analyzer_func(text)
+            self.assertEqual(sentiment, single_sentiment)
+            self.assertAlmostEqual(polarity, single_polarity, places=4)
+
+    def test_finbert_chunked_pooling(self):
+        """Test that pooled chunk scoring matches truncation for short texts and covers long ones."""
+        short = "Earnings per share have increased significantly year over year."
+        long_text = "The company announced a major loss and widespread layoffs. " * 200
+        engine = self.finbert_scanner.engine
+        for pooling in ('mean', 'weighted', 'max'):
+            with self.subTest(pooling=pooling):
+                pooled_short, pooled_long = engine.score_batch([short, long_text], pooling=pooling, max_chunks=4)
+                self.assertEqual(pooled_short, engine.score(short))
+                self.assertEqual(pooled_long[1], 'Negative')
+        chunks = engine._tokenize([long_text], 'mean', 4, 64)[0]
+        self.assertEqual(len(chunks), 4)
+
     def test_summary_calculations(self):
         """Test the average and standard deviation calculations in the summary."""
         articles = [
@@ -88,7 +130,7 @@ class TestSentimentAnalysis(unittest.TestCase):
         self.assertAlmostEqual(summary['sentiment_std_dev'], np.std(scores), places=5)
         self.assertEqual(summary['total_analyzed'], 5)
 
-    @patch('sentiment_analysis.feedparser.parse')
+    @patch('feedparser.parse')
     def test_max_age_url_formatting(self, mock_feedparser_parse):
         """Test that the max_age parameter is correctly formatted into the RSS URL."""
         mock_feedparser_parse.return_value = MagicMock(entries=[])
@@ -107,5 +149,470 @@ class TestSentimentAnalysis(unittest.TestCase):
                 call_args, _ = mock_feedparser_parse.call_args
                 self.assertIn(f"&tbs={expected_tbs}", call_args[0])
 
+class TestVaderEngine(unittest.TestCase):
+
+    def test_engine_is_shared_across_scanners(self):
+        """Test that every VADER scanner reuses the same process-wide engine."""
+        config = argparse.Namespace(analyzer='vader', format='text', file_path=None, max_age='7d')
+        with patch('sentiment_engines.VaderEngine') as mock_engine_cls:
+            with patch('sentiment_engines.registry', ModelRegistry()), patch('sentiment_analysis.registry'):
+                NewsSentimentScanner(config).analyzer_func("first")
+                NewsSentimentScanner(config).analyzer_func("second")
+        mock_engine_cls.assert_called_once_with()
+
+    def test_score_batch_matches_score(self):
+        """Test that batch scoring returns the same results as scoring one text at a time."""
+        engine = get_vader_engine()
+        texts = ["Profits soared to a record.", "Shares crashed on fraud fears.", "The meeting is on Monday."]
+        self.assertEqual(engine.score_batch(texts), [engine.score(text) for text in texts])
+        self.assertEqual([sentiment for _, sentiment in engine.score_batch(texts)], ['Positive', 'Negative', 'Neutral'])
+
+class TestScanRun(unittest.TestCase):
+
+    def test_overlapping_queries_fetch_each_article_once(self):
+        """Test that an article returned by several queries is downloaded and scored once."""
+        shared = MagicMock(title="Gold rallies - Reuters", link="https://example.com/gold?utm_source=rss", published="today")
+        other = MagicMock(title="Silver slumps - Reuters", link="https://example.com/silver", published="today")
+        config = argparse.Namespace(market='gold', num_articles=2, workers=4, format='json', analyzer='vader',
+                                    file_path=None, max_age='7d')
+        scanner = NewsSentimentScanner(config)
+        feeds = {'gold market news': [shared, other], 'gold price surge OR rally': [shared]}
+        with patch.object(scanner, '_fetch_news_items', side_effect=lambda query: feeds.get(query, [])), \
+             patch.object(scanner, '_fetch_article_content', return_value="Prices rose.") as mock_fetch:
+            results = scanner.run(return_json=True)
+
+        self.assertEqual(mock_fetch.call_count, 2)
+        self.assertEqual(results['summary']['total_analyzed'], 2)
+        gold = next(article for article in results['articles'] if article['title'].startswith("Gold"))
+        self.assertEqual(sorted(gold['matched_queries']), ['gold market news', 'gold price surge OR rally'])
+        self.assertEqual(gold['canonical_link'], "https://example.com/gold")
+
+    def test_content_cache_hit_skips_download(self):
+        """Test that a second scan with the same cache directory does not download cached articles."""
+        item = MagicMock(title="Gold rallies - Reuters", link="https://example.com/gold", published="today")
+        with tempfile.TemporaryDirectory() as cache_dir:
+            config = argparse.Namespace(market='gold', num_articles=1, workers=2, format='json', analyzer='vader',
+                                        file_path=None, max_age='7d', cache_dir=cache_dir)
+            with patch.object(NewsSentimentScanner, '_fetch_news_items', return_value=[item]), \
+                 patch.object(NewsSentimentScanner, '_download_html', return_value="<html></html>") as mock_download, \
+                 patch('newspaper.Article') as mock_article_cls:
+                mock_article = mock_article_cls.return_value
+                mock_article.text = "Gold prices rose sharply."
+                mock_article.title = "Gold rallies"
+                mock_article.authors = []
+                mock_article.publish_date = None
+                first = NewsSentimentScanner(config).run(return_json=True)
+                second = NewsSentimentScanner(config).run(return_json=True)
+
+        self.assertEqual(mock_article_cls.call_count, 1)
+        self.assertEqual(mock_download.call_count, 1)
+        self.assertEqual(first['cache']['content']['misses'], 1)
+        self.assertEqual(second['cache']['content']['hits'], 1)
+        self.assertEqual(second['articles'][0]['content'], "Gold prices rose sharply.")
+
+    def test_run_async_against_stub_server(self):
+        """Test that the asyncio scan path fetches, dedupes and scores articles from a local news server."""
+        with StubNewsServer(items_per_feed=3, article_pool=20, paragraphs=3) as stub:
+            config = argparse.Namespace(market='gold', num_articles=3, workers=4, format='json', analyzer='vader',
+                                        file_path=None, max_age='7d', rss_base_url=stub.rss_base_url)
+            results = asyncio.run(NewsSentimentScanner(config).run_async(return_json=True))
+
+        self.assertEqual(stub.requests['rss'], 14)
+        self.assertEqual(stub.requests['article'], len(results['articles']))
+        self.assertEqual(results['summary']['total_analyzed'], len(results['articles']))
+        self.assertTrue(all("Content not retrieved" not in article['content'] for article in results['articles']))
+
+    def test_run_pipeline_against_stub_server(self):
+        """Test that the staged sync pipeline scores every unique article even with single workers and tiny queues."""
+        with StubNewsServer(items_per_feed=3, article_pool=20, paragraphs=3) as stub:
+            config = argparse.Namespace(market='gold', num_articles=3, workers=4, format='json', analyzer='vader',
+                                        file_path=None, max_age='7d', rss_base_url=stub.rss_base_url,
+                                        feed_workers=1, download_workers=2, extract_workers=1, queue_size=1, batch_size=4)
+            results = NewsSentimentScanner(config).run(return_json=True)
+
+        self.assertEqual(stub.requests['rss'], 14)
+        self.assertEqual(stub.requests['article'], len(results['articles']))
+        self.assertEqual(results['summary']['total_analyzed'], len(results['articles']))
+        self.assertTrue(all("Content not retrieved" not in article['content'] for article in results['articles']))
+        stages = results['timings']['stages']
+        self.assertEqual(stages['feeds']['count'], 14)
+        self.assertEqual(stages['download']['count'], len(results['articles']))
+        self.assertEqual(set(stages), {'feeds', 'download', 'extract', 'score'})
+
+    def test_process_pool_extraction_matches_threads(self):
+        """Test that extracting pages in the shared process pool yields the same article text as in-process parsing."""
+        contents = {}
+        with StubNewsServer(items_per_feed=3, article_pool=20, paragraphs=3) as stub:
+            for processes in (0, 2):
+                config = argparse.Namespace(market='gold', num_articles=3, workers=4, format='json', analyzer='vader',
+                                            file_path=None, max_age='7d', rss_base_url=stub.rss_base_url,
+                                            extract_processes=processes)
+                sync_results = NewsSentimentScanner(config).run(return_json=True)
+                async_results = asyncio.run(NewsSentimentScanner(config).run_async(return_json=True))
+                for results in (sync_results, async_results):
+                    contents.setdefault(processes, []).append({a['link']: a['content'] for a in results['articles']})
+
+        self.assertEqual(contents[0][0], contents[0][1])
+        self.assertEqual(contents[2], contents[0])
+        self.assertTrue(all("Content not retrieved" not in text for text in contents[2][0].values()))
+
+    def test_broken_extraction_pool_is_replaced(self):
+        """Test that after an extraction worker is killed, the next extractions start a new pool and still return text."""
+        with StubNewsServer(paragraphs=3) as stub:
+            html = stub.article_html(1)
+        config = argparse.Namespace(market='gold', format='json', analyzer='vader', file_path=None, max_age='7d',
+                                    extract_processes=1)
+        scanner = NewsSentimentScanner(config)
+        expected = scanner._extract_in_pool(get_extraction_pool(1), "https://example.com/1", None, html)
+        self.assertNotIn("Content not retrieved", expected)
+
+        for extract in (scanner._extract_in_pool, scanner._extract_in_pool_async):
+            pool = get_extraction_pool(1)
+            for process in list(pool._processes.values()):
+                os.kill(process.pid, signal.SIGKILL)
+                process.join()
+            text = extract(pool, "https://example.com/1", None, html)
+            if asyncio.iscoroutine(text):
+                text = asyncio.run(text)
+            self.assertEqual(text, expected)
+            self.assertIsNot(get_extraction_pool(1), pool)
+
+    def test_feed_cache_serves_fresh_feeds_and_revalidates_stale_ones(self):
+        """Test that cached feeds skip the network within the TTL and are revalidated with their ETag after it."""
+        with StubNewsServer(items_per_feed=3, article_pool=20, paragraphs=2) as stub, \
+             tempfile.TemporaryDirectory() as cache_dir:
+            config = argparse.Namespace(market='gold', num_articles=3, workers=4, format='json', analyzer='vader',
+                                        file_path=None, max_age='7d', rss_base_url=stub.rss_base_url,
+                                        cache_dir=cache_dir, feed_ttl=60)
+            first = NewsSentimentScanner(config).run(return_json=True)
+            second = asyncio.run(NewsSentimentScanner(config).run_async(return_json=True))
+            with patch('caches.time.time', return_value=time.time() + 61):
+                third = NewsSentimentScanner(config).run(return_json=True)
+
+        self.assertEqual(first['cache']['feeds']['misses'], 14)
+        self.assertEqual(second['cache']['feeds']['hits'], 14)
+        self.assertEqual(third['cache']['feeds']['revalidated'], 14)
+        self.assertEqual((stub.requests['rss'], stub.requests['not_modified']), (14, 14))
+        self.assertEqual(len(third['articles']), len(first['articles']))
+
+    def test_stream_writes_each_article_as_ndjson(self):
+        """Test that --stream writes one NDJSON line per article plus a final summary line."""
+        articles = [
+            {'title': 'a', 'link': 'l', 'polarity': 0.8, 'sentiment': 'Positive'},
+            {'title': 'b', 'link': 'l', 'polarity': -0.4, 'sentiment': 'Negative'},
+            {'title': 'c', 'link': 'l', 'polarity': 0.0, 'sentiment': 'Neutral'},
+        ]
+        config = argparse.Namespace(format='json', file_path=None, analyzer='vader', max_age='7d', stream=True)
+        scanner = NewsSentimentScanner(config)
+        with patch.object(scanner, 'iter_articles', return_value=iter(articles)), \
+             patch('sys.stdout', new_callable=io.StringIO) as stdout:
+            scanner.run()
+
+        events = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        self.assertEqual([event['type'] for event in events], ['article', 'article', 'article', 'summary'])
+        self.assertEqual(events[1]['summary']['total_analyzed'], 2)
+        self.assertAlmostEqual(events[-1]['summary']['average_sentiment'], np.mean([0.8, -0.4, 0.0]), places=6)
+        self.assertAlmostEqual(events[-1]['summary']['sentiment_std_dev'], np.std([0.8, -0.4, 0.0]), places=6)
+
+    def test_run_markets_shares_articles_between_markets(self):
+        """Test that an article matched by two markets is fetched once and counted in both summaries."""
+        shared = MagicMock(title="Precious metals rally - Reuters", link="https://example.com/metals", published="today")
+        gold_only = MagicMock(title="Gold miners slump - Reuters", link="https://example.com/gold", published="today")
+        feeds = {'gold market news': [shared, gold_only], 'silver market news': [shared]}
+        config = argparse.Namespace(market='gold', num_articles=2, workers=4, format='json', analyzer='vader',
+                                    file_path=None, max_age='7d')
+        scanner = NewsSentimentScanner(config)
+        with patch.object(scanner, '_fetch_news_items', side_effect=lambda query: feeds.get(query, [])), \
+             patch.object(scanner, '_fetch_article_content', return_value="Prices rose.") as mock_fetch:
+            results = scanner.run_markets(['gold', 'silver'], return_json=True)
+
+        self.assertEqual(mock_fetch.call_count, 2)
+        self.assertEqual(results['markets']['gold']['summary']['total_analyzed'], 2)
+        self.assertEqual(results['markets']['silver']['summary']['total_analyzed'], 1)
+        self.assertEqual(results['timings']['unique_articles'], 2)
+
+    def test_cancelled_async_stream_cancels_pending_feeds(self):
+        """Test that cancelling the article stream, as a disconnecting client does, cancels running feed fetches."""
+        cancelled = []
+
+        async def fetch_feed(session, query):
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.append(query)
+                raise
+            return query, []
+
+        async def read_until_cancelled(scanner):
+            stream = scanner.iter_articles_async(session=MagicMock())
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(stream.__anext__(), 0.2)
+            return len(cancelled)
+
+        config = argparse.Namespace(market='gold', num_articles=1, workers=2, format='json', analyzer='vader',
+                                    file_path=None, max_age='7d')
+        scanner = NewsSentimentScanner(config)
+        with patch.object(scanner, '_fetch_news_items_async', side_effect=fetch_feed):
+            cancelled_before_shutdown = asyncio.run(asyncio.wait_for(read_until_cancelled(scanner), 10))
+
+        self.assertEqual(cancelled_before_shutdown, 14)
+
+    def test_watch_cycles_score_only_new_articles(self):
+        """Test that each watch cycle downloads only articles earlier cycles did not see and extends the series."""
+        first = MagicMock(title="Gold rallies - Reuters", link="https://example.com/gold", published="today")
+        second = MagicMock(title="Gold slumps - Reuters", link="https://example.com/gold-slump", published="today")
+        feeds = {'gold market news': [first]}
+        config = argparse.Namespace(market='gold', num_articles=2, workers=2, format='json', analyzer='vader',
+                                    file_path=None, max_age='7d')
+        scanner = NewsSentimentScanner(config)
+        store = SeriesStore()
+        with patch.object(scanner, '_fetch_news_items', side_effect=lambda query: feeds.get(query, [])), \
+             patch.object(scanner, '_fetch_article_content', return_value="Prices rose strongly.") as mock_fetch:
+            cycles = [scanner.watch_cycle(['gold'], store)]
+            cycles.append(scanner.watch_cycle(['gold'], store))
+            feeds['gold market news'] = [second, first]
+            cycles.append(scanner.watch_cycle(['gold'], store))
+
+        self.assertEqual(mock_fetch.call_count, 2)
+        self.assertEqual([cycle['markets']['gold']['new_articles'] for cycle in cycles], [1, 0, 1])
+        self.assertEqual(store.get('gold')['total_articles'], [1, 1, 2])
+
+    def test_watch_retries_articles_whose_scoring_failed(self):
+        """Test that an article whose scoring fails is not marked seen, so the next cycle scores and counts it."""
+        rally = MagicMock(title="Gold rallies - Reuters", link="https://example.com/gold", published="today")
+        slump = MagicMock(title="Gold slumps - Reuters", link="https://example.com/gold-slump", published="today")
+        feeds = {'gold market news': [rally, slump]}
+        config = argparse.Namespace(market='gold', num_articles=2, workers=2, format='json', analyzer='vader',
+                                    file_path=None, max_age='7d', batch_size=1)
+        scanner = NewsSentimentScanner(config)
+        store = SeriesStore()
+        failures = ["slumps"]
+
+        def analyze(texts):
+            if failures and any(failures[0] in text for text in texts):
+                failures.pop()
+                raise RuntimeError("model crashed")
+            return [(0.5, 'Positive')] * len(texts)
+
+        with patch.object(scanner, '_fetch_news_items', side_effect=lambda query: feeds.get(query, [])), \
+             patch.object(scanner, '_fetch_article_content', return_value="Prices moved.") as mock_fetch, \
+             patch.object(scanner, '_analyze_batch', side_effect=analyze):
+            first = scanner.watch_cycle(['gold'], store)
+            second = scanner.watch_cycle(['gold'], store)
+            third = scanner.watch_cycle(['gold'], store)
+
+        self.assertEqual([c['markets']['gold']['new_articles'] for c in (first, second, third)], [1, 1, 0])
+        self.assertEqual(mock_fetch.call_count, 3)
+        self.assertEqual(store.get('gold')['total_articles'], [1, 2, 2])
+
+    def test_watch_counts_known_article_for_a_new_market(self):
+        """Test that an article scored for one market is counted, without downloading it again, when another market finds it."""
+        shared = MagicMock(title="Metals rally - Reuters", link="https://example.com/metals", published="today")
+        feeds = {'gold market news': [shared]}
+        config = argparse.Namespace(market='gold', num_articles=1, workers=2, format='json', analyzer='vader',
+                                    file_path=None, max_age='7d')
+        scanner = NewsSentimentScanner(config)
+        store = SeriesStore()
+        with patch.object(scanner, '_fetch_news_items', side_effect=lambda query: feeds.get(query, [])), \
+             patch.object(scanner, '_fetch_article_content', return_value="Prices rose strongly.") as mock_fetch:
+            first = scanner.watch_cycle(['gold', 'silver'], store)
+            feeds['silver market news'] = [shared]
+            second = scanner.watch_cycle(['gold', 'silver'], store)
+
+        self.assertEqual(mock_fetch.call_count, 1)
+        self.assertEqual(first['markets']['silver']['new_articles'], 0)
+        self.assertEqual(second['markets']['gold']['new_articles'], 0)
+        self.assertEqual(second['markets']['silver']['new_articles'], 1)
+        self.assertEqual(second['markets']['silver']['ewma'], first['markets']['gold']['ewma'])
+
+    def test_async_watch_cycle_against_stub_server(self):
+        """Test that a repeated async watch cycle re-reads the feeds but downloads no article twice."""
+        store = SeriesStore()
+        with StubNewsServer(items_per_feed=3, article_pool=20, paragraphs=2) as stub:
+            config = argparse.Namespace(market='gold', num_articles=3, workers=4, format='json', analyzer='vader',
+                                        file_path=None, max_age='7d', rss_base_url=stub.rss_base_url)
+            scanner = NewsSentimentScanner(config)
+            first = asyncio.run(scanner.watch_cycle_async(['gold'], store))
+            downloaded = stub.requests['article']
+            second = asyncio.run(scanner.watch_cycle_async(['gold'], store))
+
+        self.assertEqual(stub.requests['rss'], 28)
+        self.assertEqual(stub.requests['article'], downloaded)
+        self.assertEqual(first['markets']['gold']['new_articles'], downloaded)
+        self.assertEqual(second['markets']['gold']['new_articles'], 0)
+        self.assertEqual(second['markets']['gold']['ewma'], first['markets']['gold']['ewma'])
+
+    def test_parse_interval(self):
+        """Test that watch intervals accept plain seconds and s/m/h suffixes."""
+        self.assertEqual([parse_interval(v) for v in ("90", "30s", "5m", "1h")], [90.0, 30.0, 300.0, 3600.0])
+        with self.assertRaises(argparse.ArgumentTypeError):
+            parse_interval("soon")
+
+class TestRunningSummary(unittest.TestCase):
+
+    def test_matches_numpy(self):
+        """Test that the online mean and standard deviation match numpy."""
+        scores = [0.8, 0.6, -0.4, -0.2, 0.0, 0.95, -0.99]
+        running = RunningSummary()
+        for score in scores:
+            running.update(score, 'Positive' if score > 0 else 'Negative' if score < 0 else 'Neutral')
+        summary = running.to_dict()
+        self.assertEqual(summary['total_analyzed'], 7)
+        self.assertEqual((summary['positive'], summary['negative'], summary['neutral']), (3, 3, 1))
+        self.assertAlmostEqual(summary['average_sentiment'], np.mean(scores), places=9)
+        self.assertAlmostEqual(summary['sentiment_std_dev'], np.std(scores), places=9)
+
+    def test_empty(self):
+        """Test that an empty summary reports zeros."""
+        self.assertEqual(RunningSummary().to_dict()['sentiment_std_dev'], 0.0)
+
+class TestChunkPooling(unittest.TestCase):
+
+    def test_pooling_modes(self):
+        """Test mean, length-weighted and max-confidence pooling of chunk probabilities."""
+        probabilities = [[0.2, 0.7, 0.1], [0.1, 0.0, 0.9]]
+        lengths = [300, 100]
+        np.testing.assert_allclose(pool_probabilities(probabilities, lengths, 'mean'), [0.15, 0.35, 0.5])
+        np.testing.assert_allclose(pool_probabilities(probabilities, lengths, 'weighted'), [0.175, 0.525, 0.3])
+        np.testing.assert_allclose(pool_probabilities(probabilities, lengths, 'max'), [0.1, 0.0, 0.9])
+
+    def test_select_chunks_spreads_across_article(self):
+        """Test that capped chunks keep the first and last chunk and spread the rest evenly."""
+        self.assertEqual(select_chunks(list(range(10)), 4), [0, 3, 6, 9])
+        self.assertEqual(select_chunks([0, 1], 4), [0, 1])
+        self.assertEqual(select_chunks([0, 1, 2], 0), [0])
+
+    def test_max_chunks_must_be_positive(self):
+        """Test that --max_chunks rejects zero and negative counts."""
+        self.assertEqual(positive_int("3"), 3)
+        for value in ("0", "-2", "few"):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                positive_int(value)
+
+    def test_chunk_stride_must_fit_in_a_chunk(self):
+        """Test that strides leaving no new tokens per 512-token chunk are rejected with a clear error."""
+        self.assertEqual(check_chunk_stride(0), 0)
+        self.assertEqual(parse_chunk_stride("509"), 509)
+        with self.assertRaisesRegex(ValueError, "between 0 and 509"):
+            check_chunk_stride(510)
+        for value in ("-1", "510", "many"):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                parse_chunk_stride(value)
+
+class TestModelRegistry(unittest.TestCase):
+
+    def test_concurrent_first_requests_load_once(self):
+        """Test that concurrent callers share a single load of the same analyzer."""
+        registry = ModelRegistry()
+        with patch('sentiment_engines.VaderEngine') as mock_engine_cls:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                engines = list(executor.map(lambda _: registry.get('vader'), range(16)))
+        mock_engine_cls.assert_called_once_with()
+        self.assertTrue(all(engine is engines[0] for engine in engines))
+        self.assertIn('load_seconds', registry.stats()['vader'])
+        self.assertIn('rss_delta_bytes', registry.stats()['vader'])
+
+    def test_unknown_analyzer(self):
+        """Test that requesting an unknown analyzer raises ValueError."""
+        with self.assertRaises(ValueError):
+            ModelRegistry().get('no-such-model')
+
+def save_tiny_bert(directory):
+    """Save a randomly initialised three-label BERT small enough to build in a test."""
+    import torch
+    from transformers import BertConfig, BertForSequenceClassification, BertTokenizerFast
+
+    words = "gold silver prices rose fell sharply on rate cut hopes shares slump the company reported a loss".split()
+    os.makedirs(directory)
+    vocab_file = os.path.join(directory, "vocab.txt")
+    with open(vocab_file, "w") as f:
+        f.write("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + words))
+    BertTokenizerFast(vocab_file=vocab_file).save_pretrained(directory)
+    torch.manual_seed(0)
+    config = BertConfig(vocab_size=5 + len(words), hidden_size=32, num_hidden_layers=2, num_attention_heads=2,
+                        intermediate_size=64, num_labels=3)
+    BertForSequenceClassification(config).save_pretrained(directory)
+
+class TestFinbertBackends(unittest.TestCase):
+
+    texts = ["Gold prices rose sharply on rate cut hopes.", "Shares slump.", "The company reported a loss " * 20]
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cls.model_dir = os.path.join(cls.tmpdir.name, "model")
+        cls.cache_dir = os.path.join(cls.tmpdir.name, "cache")
+        save_tiny_bert(cls.model_dir)
+        cls.expected = cls.probabilities(FinbertEngine(cls.model_dir))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmpdir.cleanup()
+
+    @classmethod
+    def probabilities(cls, engine):
+        chunks = [chunk for chunks in engine._tokenize(cls.texts, None, 1, 0) for chunk in chunks]
+        return np.array(engine._predict(chunks, 2))
+
+    def test_int8_close_to_fp32_and_cached(self):
+        """Test that the int8 backend tracks the fp32 model and reloads from its cached weights."""
+        from transformers import AutoModelForSequenceClassification
+
+        engine = QuantizedFinbertEngine(self.model_dir, cache_dir=self.cache_dir)
+        np.testing.assert_allclose(self.probabilities(engine), self.expected, atol=0.02)
+        self.assertTrue(os.path.exists(engine.artifact_path('.int8.pt')))
+
+        with patch.object(AutoModelForSequenceClassification, 'from_pretrained', side_effect=AssertionError):
+            reloaded = QuantizedFinbertEngine(self.model_dir, cache_dir=self.cache_dir)
+        np.testing.assert_allclose(self.probabilities(reloaded), self.probabilities(engine), atol=1e-6)
+
+    @unittest.skipUnless(importlib.util.find_spec('onnx') and importlib.util.find_spec('onnxruntime'),
+                         "onnx and onnxruntime are not installed")
+    def test_onnx_matches_fp32_and_cached(self):
+        """Test that the ONNX Runtime backend matches the PyTorch model and exports only once."""
+        engine = OnnxFinbertEngine(self.model_dir, cache_dir=self.cache_dir)
+        np.testing.assert_allclose(self.probabilities(engine), self.expected, atol=1e-5)
+        with patch('torch.onnx.export', side_effect=AssertionError):
+            OnnxFinbertEngine(self.model_dir, cache_dir=self.cache_dir)
+
+    def test_registry_creates_backends(self):
+        """Test that the registry builds each FinBERT backend under its analyzer name."""
+        registry = ModelRegistry()
+        engine = registry.get('finbert-int8', model_name=self.model_dir, cache_dir=self.cache_dir)
+        self.assertEqual((engine.name, engine.revision), ('finbert-int8', self.model_dir))
+        self.assertGreater(registry.stats()['finbert-int8']['parameter_bytes'], 0)
+
+class TestMicroBatcher(unittest.TestCase):
+
+    def test_flushes_full_batches(self):
+        """Test that texts are grouped into batches no larger than max_batch_size."""
+        batch_sizes = []
+        def score_batch(texts):
+            batch_sizes.append(len(texts))
+            return [(float(len(text)), 'Neutral') for text in texts]
+
+        with MicroBatcher(score_batch, max_batch_size=4, max_wait=1.0) as batcher:
+            futures = [batcher.submit("x" * i) for i in range(10)]
+        self.assertEqual([future.result()[0] for future in futures], [float(i) for i in range(10)])
+        self.assertTrue(all(size <= 4 for size in batch_sizes))
+        self.assertEqual(sum(batch_sizes), 10)
+
+    def test_flushes_partial_batch_after_max_wait(self):
+        """Test that a partial batch is scored once max_wait has elapsed."""
+        with MicroBatcher(lambda texts: [(0.0, 'Neutral')] * len(texts), max_batch_size=100, max_wait=0.01) as batcher:
+            future = batcher.submit("only text")
+            self.assertEqual(future.result(timeout=5), (0.0, 'Neutral'))
+
+    def test_errors_propagate_to_every_future(self):
+        """Test that an exception from score_batch is raised from each future in the batch."""
+        def score_batch(texts):
+            raise RuntimeError("model failure")
+
+        with MicroBatcher(score_batch, max_batch_size=2, max_wait=0.01) as batcher:
+            futures = [batcher.submit("a"), batcher.submit("b")]
+        for future in futures:
+            with self.assertRaises(RuntimeError):
+                future.result()
+
 if __name__ == '__main__':
     unittest.main()
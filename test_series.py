@@ -0,0 +1,69 @@
+import unittest
+import math
+
+from series import EwmaStats, SentimentSeries, SeriesStore
+
+class TestEwmaStats(unittest.TestCase):
+
+    def test_matches_weighted_definition(self):
+        """Test that the incremental EWMA equals the explicitly weighted mean and variance."""
+        alpha = 0.3
+        values = [0.5, -0.2, 0.9, 0.1, -0.7, 0.4]
+        stats = EwmaStats(alpha)
+        for value in values:
+            stats.update(value)
+
+        mean, var = values[0], 0.0
+        for value in values[1:]:
+            diff = value - mean
+            mean = mean + alpha * diff
+            var = (1 - alpha) * (var + alpha * diff * diff)
+        weights = [alpha * (1 - alpha) ** (len(values) - 1 - i) for i in range(1, len(values))]
+        weights.insert(0, (1 - alpha) ** (len(values) - 1))
+        self.assertAlmostEqual(stats.mean, sum(w * v for w, v in zip(weights, values)), places=12)
+        self.assertAlmostEqual(stats.std_dev, math.sqrt(var), places=12)
+        self.assertEqual(stats.count, len(values))
+
+class TestSentimentSeries(unittest.TestCase):
+
+    def test_record_returns_point_with_integer_counts(self):
+        """Test that a recorded point holds the cycle mean, EWMA and integer article counts."""
+        series = SentimentSeries(alpha=0.5)
+        point = series.record(100.0, [0.2, 0.6])
+        self.assertEqual(point['new_articles'], 2)
+        self.assertIsInstance(point['total_articles'], int)
+        self.assertAlmostEqual(point['cycle_mean'], 0.4)
+        self.assertAlmostEqual(point['ewma'], 0.4)
+
+    def test_empty_cycle_has_no_mean(self):
+        """Test that a cycle without new articles keeps the EWMA and reports no cycle mean."""
+        series = SentimentSeries()
+        series.record(1.0, [0.5])
+        point = series.record(2.0, [])
+        self.assertIsNone(point['cycle_mean'])
+        self.assertEqual((point['new_articles'], point['total_articles']), (0, 1))
+        self.assertEqual(point['ewma'], 0.5)
+
+    def test_since_limit_and_max_points(self):
+        """Test that the oldest points are dropped past max_points and to_dict filters by time and count."""
+        series = SentimentSeries(max_points=3)
+        for timestamp in range(5):
+            series.record(float(timestamp), [0.1])
+        self.assertEqual(len(series), 3)
+        self.assertEqual(series.to_dict()['timestamp'], [2.0, 3.0, 4.0])
+        self.assertEqual(series.to_dict(since=2.0)['timestamp'], [3.0, 4.0])
+        self.assertEqual(series.to_dict(limit=1)['total_articles'], [5])
+
+class TestSeriesStore(unittest.TestCase):
+
+    def test_markets_are_independent(self):
+        """Test that each market gets its own series and unknown markets return None."""
+        store = SeriesStore()
+        store.record('gold', 1.0, [0.5])
+        store.record('silver', 1.0, [-0.5, -0.3])
+        self.assertEqual(sorted(store.markets()), ['gold', 'silver'])
+        self.assertEqual(store.get('silver')['total_articles'], [2])
+        self.assertIsNone(store.get('copper'))
+
+if __name__ == '__main__':
+    unittest.main()